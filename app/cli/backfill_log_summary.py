@@ -0,0 +1,35 @@
+"""Rebuild log_daily_summaries from log_books.
+
+    python -m app.cli.backfill_log_summary [--from YYYY-MM-DD] [--to YYYY-MM-DD]
+
+Without dates the whole history is rebuilt. Safe to run while the
+backend is live; writers wait for the rebuild to commit.
+"""
+import argparse
+from datetime import date
+
+from app.database import SessionLocal, init_db
+from app.services.log_summary_service import rebuild_summaries
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild the daily log summary table")
+    parser.add_argument("--from", dest="date_from", type=date.fromisoformat)
+    parser.add_argument("--to", dest="date_to", type=date.fromisoformat)
+    args = parser.parse_args(argv)
+
+    init_db()
+    db = SessionLocal()
+    try:
+        rows = rebuild_summaries(db, args.date_from, args.date_to)
+        db.commit()
+        print(f"✅ Rebuilt {rows} summary rows")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+"""Microbenchmarks for the per-frame recognition path on synthetic data.
+
+    python -m app.cli.benchmark [--only frame,match] [--sizes 100,1000,10000,50000]
+                                [--out bench.json] [--compare baseline.json] [--threshold 0.2]
+
+Stages: frame decoding (base64, binary header, JPEG decode, resize, colour
+conversion), dlib detection/encoding, gallery matching, redis cache
+(de)serialization and JSON response building. Images, embeddings and
+students are generated, so no DB or redis is needed. The face_recognition
+stages are reported as skipped when dlib is not installed; run inside the
+backend container to include them.
+
+Writes one JSON document ({"meta": ..., "results": [...]}) to stdout or
+--out. With --compare, medians are checked against an earlier run; any
+benchmark slower by more than --threshold is listed on stderr and the exit
+status is 1.
+"""
+import argparse
+import base64
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import cv2
+import numpy as np
+
+from app.cli.ann_report import probes, synthetic_gallery
+from app.core.config import FRAME_SCALE
+from app.services.face_matcher import FaceMatcher
+from app.services.face_service import compare_faces
+from app.services.inference_service import decode_image
+from app.utils.cache_utils import (
+    gallery_event,
+    pack_embeddings,
+    parse_gallery_event,
+    unpack_embeddings,
+    upsert_row,
+)
+from app.utils.frame_protocol import b64_to_bytes, encode_binary_frame, parse_binary_frame
+
+GROUPS = ("frame", "face", "match", "cache", "response")
+RESOLUTIONS = ((640, 480), (1280, 720))
+MIN_SAMPLE_S = 0.02
+
+
+def measure(fn, repeat: int) -> dict:
+    """Per-call timings of ``fn``; each sample loops until it lasts MIN_SAMPLE_S."""
+    fn()  # warm caches and lazy imports
+    loops = 1
+    while True:
+        t = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - t
+        if elapsed >= MIN_SAMPLE_S or loops >= 1 << 20:
+            break
+        loops *= 10 if elapsed < MIN_SAMPLE_S / 10 else 2
+
+    samples = [elapsed / loops]
+    for _ in range(repeat - 1):
+        t = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        samples.append((time.perf_counter() - t) / loops)
+    ms = [s * 1000 for s in samples]
+    return {
+        "loops": loops,
+        "samples": len(ms),
+        "min_ms": round(min(ms), 6),
+        "median_ms": round(statistics.median(ms), 6),
+        "mean_ms": round(statistics.fmean(ms), 6),
+        "stdev_ms": round(statistics.stdev(ms), 6) if len(ms) > 1 else 0.0,
+    }
+
+
+def synthetic_frame(width: int, height: int, seed: int = 0) -> np.ndarray:
+    """Camera-like BGR frame: gradient, blocks and sensor noise (JPEG-compresses realistically)."""
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    img = np.stack([x + 0 * y, y + 0 * x, (x + y) / 2], axis=2)
+    for _ in range(12):
+        x0, y0 = rng.integers(0, width - 40), rng.integers(0, height - 40)
+        img[y0:y0 + rng.integers(20, 160), x0:x0 + rng.integers(20, 160)] = rng.integers(0, 256, 3)
+    img += rng.normal(0, 6, img.shape)
+    return np.clip(img, 0, 255).astype(np.uint8)
+
+
+def synthetic_students(n: int) -> list:
+    return [{"id": i + 1, "name": f"Student {i + 1}", "tipe_class": "X-A", "branch_id": 1} for i in range(n)]
+
+
+# ---------------------------------------------------------------------------
+# Benchmark groups: each yields (name, params, fn) or (name, params, skip reason)
+# ---------------------------------------------------------------------------
+def bench_frame(args):
+    for width, height in RESOLUTIONS:
+        params = {"resolution": f"{width}x{height}"}
+        frame = synthetic_frame(width, height)
+        jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 80])[1].tobytes()
+        data_url = "data:image/jpeg;base64," + base64.b64encode(jpeg).decode()
+        binary = encode_binary_frame(jpeg, "mengambil", 1)
+        small = cv2.resize(frame, (0, 0), fx=FRAME_SCALE, fy=FRAME_SCALE)
+        p = {**params, "jpeg_bytes": len(jpeg)}
+
+        yield "frame.b64_decode", p, lambda: b64_to_bytes(data_url)
+        yield "frame.binary_parse", p, lambda: parse_binary_frame(binary)
+        yield "frame.jpeg_decode", p, lambda: decode_image(jpeg)
+        yield "frame.resize", {**params, "scale": FRAME_SCALE}, lambda: cv2.resize(frame, (0, 0), fx=FRAME_SCALE, fy=FRAME_SCALE)
+        yield "frame.bgr_to_rgb", {**params, "scale": FRAME_SCALE}, lambda: cv2.cvtColor(small, cv2.COLOR_BGR2RGB)
+
+
+def bench_face(args):
+    try:
+        import face_recognition
+    except ImportError:
+        yield "face.*", {}, "face_recognition not installed"
+        return
+    from app.services.inference_service import detect_and_encode
+
+    for width, height in RESOLUTIONS:
+        params = {"resolution": f"{width}x{height}", "scale": FRAME_SCALE}
+        frame = synthetic_frame(width, height)
+        jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 80])[1].tobytes()
+        rgb = cv2.cvtColor(cv2.resize(frame, (0, 0), fx=FRAME_SCALE, fy=FRAME_SCALE), cv2.COLOR_BGR2RGB)
+        h, w = rgb.shape[:2]
+        box = (h // 4, w * 3 // 4, h * 3 // 4, w // 4)  # (top, right, bottom, left)
+
+        yield "face.locations", params, lambda: face_recognition.face_locations(rgb)
+        for faces in (1, 3):
+            yield ("face.encodings", {**params, "faces": faces},
+                   lambda faces=faces: face_recognition.face_encodings(rgb, known_face_locations=[box] * faces))
+        # the whole inference job a worker runs per frame (no faces in synthetic frames: detector cost only)
+        yield "face.detect_and_encode", params, lambda: detect_and_encode(jpeg)
+
+
+def bench_match(args):
+    for n in args.sizes:
+        matrix = synthetic_gallery(n)
+        students = synthetic_students(n)
+        params = {"gallery": n}
+        exact = FaceMatcher(matrix, students, ann=False)
+
+        yield "match.compare_faces", params, lambda: compare_faces(matrix, matrix[0])
+        yield "match.build_exact", params, lambda: FaceMatcher(matrix, students, ann=False)
+        for faces in (1, 3):
+            queries = probes(matrix, faces)
+            yield "match.exact", {**params, "faces": faces}, lambda q=queries: exact.match(q, k=2)
+
+        if n >= args.ann_min:
+            ivf = FaceMatcher(matrix, students, ann=True)
+            yield "match.build_ivf", params, lambda: FaceMatcher(matrix, students, ann=True)
+            yield ("match.rebuild_ivf", params,
+                   lambda: FaceMatcher(matrix, students, ann=True, previous=ivf))
+            for faces in (1, 3):
+                queries = probes(matrix, faces)
+                yield "match.ivf", {**params, "faces": faces}, lambda q=queries: ivf.match(q, k=2)
+
+
+def bench_cache(args):
+    for n in args.sizes:
+        matrix = synthetic_gallery(n)
+        students = synthetic_students(n)
+        blob = pack_embeddings(matrix)
+        meta_json = json.dumps(students)
+        params = {"gallery": n}
+
+        yield "cache.pack_embeddings", params, lambda: pack_embeddings(matrix)
+        yield "cache.unpack_embeddings", params, lambda: unpack_embeddings(blob)
+        yield "cache.meta_dumps", params, lambda: json.dumps(students)
+        yield "cache.meta_loads", params, lambda: json.loads(meta_json)
+        new = {"id": n + 1, "name": "New", "tipe_class": "X-A", "branch_id": 1}
+        yield "cache.upsert_row", params, lambda: upsert_row(students, matrix, new, matrix[0])
+
+    row = synthetic_gallery(1)[0]
+    event = gallery_event("upsert", 1, 2, student=synthetic_students(1)[0], embedding=row)
+    yield "cache.gallery_event", {}, lambda: gallery_event("upsert", 1, 2, student=synthetic_students(1)[0], embedding=row)
+    yield "cache.parse_gallery_event", {}, lambda: parse_gallery_event(event)
+
+
+def bench_response(args):
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+
+    stats = {"received": 1200, "processed": 1100, "dropped": 90, "stale": 10, "invalid": 0,
+             "encoded": 300, "reused": 800, "tracks": 2}
+    for faces in (1, 3):
+        payload = {
+            "seq": 1234,
+            "results": [{"name": f"Student {i}", "status": "MENGAMBIL_SUCCESS"} for i in range(faces)],
+            "stats": stats,
+        }
+        # what websocket.send_json serializes for every processed frame
+        yield ("response.ws_frame", {"faces": faces},
+               lambda payload=payload: json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode())
+
+    start = datetime(2025, 1, 1, 7, 0, tzinfo=timezone.utc)
+    for rows in (50, 500):
+        items = [
+            {"id": i, "student_id": i % 700, "name": f"Student {i % 700}", "tipe": "LAPTOP",
+             "mengambil": "SUDAH", "mengembalikan": "SUDAH" if i % 2 == 0 else "BELUM",
+             "created_at": (start + timedelta(minutes=i)).strftime("%Y-%m-%d %H:%M:%S"), "branch_id": 1}
+            for i in range(rows)
+        ]
+        page = {"log-laptop": items, "next_cursor": "WyIyMDI1LTAxLTAxVDA3OjAwOjAwIiwgMV0"}
+        # FastAPI's path for a dict returned from a route
+        yield "response.log_page", {"rows": rows}, lambda page=page: JSONResponse(jsonable_encoder(page)).body
+
+
+BENCHMARKS = {
+    "frame": bench_frame,
+    "face": bench_face,
+    "match": bench_match,
+    "cache": bench_cache,
+    "response": bench_response,
+}
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _meta(args) -> dict:
+    return {
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "machine": platform.machine(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "sizes": args.sizes,
+    }
+
+
+def _key(result: dict) -> str:
+    return result["name"] + json.dumps(result["params"], sort_keys=True)
+
+
+def compare(results: list, baseline: dict, threshold: float) -> list:
+    """Return [(key, baseline_ms, current_ms, ratio)] for benchmarks slower than 1 + threshold."""
+    before = {_key(r): r["median_ms"] for r in baseline.get("results", []) if "median_ms" in r}
+    regressions = []
+    for r in results:
+        old = before.get(_key(r))
+        if old and "median_ms" in r:
+            ratio = r["median_ms"] / old
+            r["baseline_ratio"] = round(ratio, 3)
+            if ratio > 1 + threshold:
+                regressions.append((_key(r), old, r["median_ms"], ratio))
+    return regressions
+
+
+def run(args) -> list:
+    results = []
+    for group in args.only:
+        for name, params, fn in BENCHMARKS[group](args):
+            if isinstance(fn, str):
+                results.append({"name": name, "params": params, "skipped": fn})
+                print(f"  {name}: skipped ({fn})", file=sys.stderr)
+                continue
+            result = {"name": name, "params": params, **measure(fn, args.repeat)}
+            results.append(result)
+            print(f"  {name} {json.dumps(params)}: {result['median_ms']:.4f} ms", file=sys.stderr)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Microbenchmarks for the recognition pipeline")
+    parser.add_argument("--only", default=",".join(GROUPS), help=f"comma-separated groups ({', '.join(GROUPS)})")
+    parser.add_argument("--sizes", default="100,1000,10000,50000", help="synthetic gallery sizes")
+    parser.add_argument("--ann-min", type=int, default=10000, help="also benchmark the IVF index from this gallery size")
+    parser.add_argument("--repeat", type=int, default=5, help="samples per benchmark")
+    parser.add_argument("--out", help="write the JSON results here instead of stdout")
+    parser.add_argument("--compare", help="earlier results file to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed median slowdown (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    args.only = [g.strip() for g in args.only.split(",") if g.strip()]
+    unknown = set(args.only) - set(GROUPS)
+    if unknown:
+        parser.error(f"unknown groups: {', '.join(sorted(unknown))}")
+    args.sizes = [int(n) for n in args.sizes.split(",")]
+    args.repeat = max(2, args.repeat)
+
+    report = {"meta": _meta(args), "results": run(args)}
+
+    regressions = []
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        report["meta"]["baseline_commit"] = baseline.get("meta", {}).get("commit")
+        regressions = compare(report["results"], baseline, args.threshold)
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    for key, old, new, ratio in regressions:
+        print(f"⚠️ {key}: {old:.4f} ms -> {new:.4f} ms ({ratio:.2f}x)", file=sys.stderr)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Enroll students from a manifest CSV and a directory of photos.
+
+    python -m app.cli.enroll_students students.csv --images ./photos [--branch-id 1] [--workers 4] [--report report.csv]
+
+Manifest columns: name,tipe_class,branch_id,image (image = file name in
+--images; branch_id may be left empty when --branch-id is given). Faces are
+encoded on a local process pool; failed rows are printed and, with
+--report, written to a CSV next to the successful ones.
+"""
+import argparse
+import asyncio
+import csv
+import os
+from functools import partial
+
+from app.database import init_db
+from app.services.enrollment_service import ManifestError, attach_images, enroll, parse_manifest
+from app.services.inference_service import InferencePool
+from app.utils.redis_client import get_redis, get_redis_raw
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+async def run(args) -> int:
+    with open(args.manifest, encoding="utf-8-sig") as f:
+        items = parse_manifest(f.read(), default_branch_id=args.branch_id)
+
+    loaders = {
+        entry.name: partial(_read_file, entry.path)
+        for entry in os.scandir(args.images)
+        if entry.is_file()
+    }
+    attach_images(items, loaders)
+
+    pool = InferencePool(workers=args.workers, max_pending=args.workers * 2)
+    pool.start()
+    try:
+        report = await enroll(items, pool, concurrency=args.workers * 2)
+    finally:
+        pool.shutdown()
+        await get_redis().aclose()
+        await get_redis_raw().aclose()
+
+    summary = report.as_dict()
+    for r in report.results:
+        if r.status != "ok":
+            print(f"❌ row {r.row} {r.name or '-'} ({r.image or '-'}): {r.error}")
+    print(f"✅ Enrolled {summary['enrolled']}/{summary['total']} students, {summary['failed']} failed")
+    if summary["enrolled"] and not summary["cache_refreshed"]:
+        print("⚠️ Student cache not refreshed; the backend picks new students up on its next refresh")
+
+    if args.report:
+        with open(args.report, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=["row", "name", "image", "status", "student_id", "error"])
+            writer.writeheader()
+            writer.writerows(r.__dict__ for r in report.results)
+
+    return 0 if summary["failed"] == 0 else 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk enroll students from a CSV and a photo directory")
+    parser.add_argument("manifest")
+    parser.add_argument("--images", required=True, help="directory with the photos named in the manifest")
+    parser.add_argument("--branch-id", type=int, help="branch for rows without branch_id")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="face encoding processes")
+    parser.add_argument("--report", help="write a per-row CSV report here")
+    args = parser.parse_args(argv)
+
+    init_db()
+    try:
+        return asyncio.run(run(args))
+    except ManifestError as e:
+        print(f"❌ Invalid manifest: {e}")
+        return 2
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
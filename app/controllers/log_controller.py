@@ -1,21 +1,15 @@
 # app/controllers/log_controller.py  (update your file path accordingly)
 from fastapi import WebSocket, WebSocketDisconnect, HTTPException
-from app.database import SessionLocal
-from app.models import Student, LogBook
-from app.services.face_service import compare_faces
-from app.utils.auth import decode_token_get_user
-from app.utils.cache_utils import get_students_by_branch, seed_students_cache
-from app.utils.redis_client import get_redis
-from datetime import datetime, date
-import cv2, base64, json, numpy as np
+from app.services.gallery import get_gallery_registry
+from app.services.inference_service import get_inference_pool, detect_and_encode, InferenceError
+from app.services.latest_frame import LatestFrameSlot
+from app.services.face_tracker import FaceTracker
+from app.services.log_writer import get_log_writer
+from app.core.config import FRAME_MAX_AGE, FRAME_SCALE
+from app.utils.auth import authenticate_token
+from app.utils.frame_protocol import receive_frame, is_binary
 import asyncio
 
-def b64_to_cv2_img(b64str: str):
-    header, data = b64str.split(",", 1) if "," in b64str else (None, b64str)
-    img_bytes = base64.b64decode(data)
-    np_arr = np.frombuffer(img_bytes, np.uint8)
-    return cv2.imdecode(np_arr, cv2.IMREAD_COLOR)
-
 
 async def process_log(websocket: WebSocket, tipe: str):
     # Try to get token from query parameter first (for browser WebSocket)
@@ -43,91 +37,84 @@ async def process_log(websocket: WebSocket, tipe: str):
         token = parts[1]
 
     try:
-        current_user = decode_token_get_user(token)
-    except HTTPException as e:
+        current_user = await authenticate_token(token)
+    except HTTPException:
         await websocket.close(code=1008)
         return
 
     branch_id = None if (current_user["role"] and current_user["role"].upper() == "ADMIN") else current_user["branch_id"]
 
-    try:
-        students = await get_students_by_branch(branch_id)
-    except Exception:
-        await seed_students_cache()
-        students = await get_students_by_branch(branch_id)
-
-    known_encodings = []
-    known_students = []
-    for s in students:
-        emb = s.get("face_embedding")
-        if emb:
-            known_encodings.append(np.array(emb, dtype=np.float64))
-            known_students.append(s)
+    # galleries are shared by every session of this worker and kept current by gallery events
+    galleries = get_gallery_registry()
+    await galleries.get(branch_id)
+    pool = get_inference_pool()
+    binary = is_binary(websocket)
+    slot = LatestFrameSlot(max_age=FRAME_MAX_AGE)
+    tracker = FaceTracker()
+    log_writer = get_log_writer()
+
+    def session_stats():
+        return {**slot.stats(), **tracker.stats()}
+
+    async def reader():
+        # keep draining the socket so stale frames never queue up behind inference
+        try:
+            while True:
+                try:
+                    slot.put(await receive_frame(websocket, binary))
+                except ValueError:
+                    slot.invalid += 1
+        except WebSocketDisconnect:
+            print("❌ Client disconnected")
+        except Exception as e:
+            print("Error in process_log reader:", e)
+        finally:
+            slot.close()
+
+    reader_task = asyncio.create_task(reader())
 
     try:
         while True:
-            data = await websocket.receive_text()
-            payload = json.loads(data)
-            frame_b64 = payload.get("frame")
-            action = payload.get("action", "mengambil")
-
-            frame = b64_to_cv2_img(frame_b64)
-            small = cv2.resize(frame, (0, 0), fx=0.5, fy=0.5)
-            rgb_small = cv2.cvtColor(small, cv2.COLOR_BGR2RGB)
-
-            import face_recognition 
-            face_encs = face_recognition.face_encodings(rgb_small)
+            frame = await slot.get()
+            if frame is None:
+                break
+            action = frame.action
+
+            try:
+                boxes, reused_ids, face_encs = await pool.run(
+                    detect_and_encode, frame.buf, frame.offset, FRAME_SCALE, tracker.reusable()
+                )
+            except InferenceError as e:
+                await websocket.send_json({"seq": frame.seq, "results": [], "error": str(e), "stats": session_stats()})
+                continue
             results_list = []
 
-            for enc in face_encs:
-                if len(known_encodings) == 0:
-                    results_list.append({"name": "Unknown Face", "status": "NOT_FOUND"})
-                    continue
+            gallery = await galleries.get(branch_id)
+            tracks = tracker.update(boxes, reused_ids, gallery.matcher.match(face_encs))
 
-                results, dists = compare_faces(known_encodings, enc)
+            for track in tracks:
                 name, status = "Unknown Face", "NOT_FOUND"
 
-                if True in results:
-                    idx = int(np.argmin(dists))
-                    student = known_students[idx]
+                if track.confirmed:
+                    student = track.student
                     name = student.get("name")
 
-                    db = SessionLocal()
-                    try:
-                        today = date.today()
-                        start_dt = datetime(today.year, today.month, today.day)
-                        log = db.query(LogBook).filter(
-                            LogBook.student_id == student.get("id"),
-                            LogBook.tipe == tipe,
-                            LogBook.created_at >= start_dt
-                        ).first()
-
-                        if not log:
-                            log = LogBook(student_id=student.get("id"), tipe=tipe)
-                            db.add(log)
-
-                        changed = False
-                        if action == "mengambil" and log.mengambil != "SUDAH":
-                            log.mengambil = "SUDAH"
-                            changed = True
-                        elif action == "mengembalikan" and log.mengembalikan != "SUDAH":
-                            log.mengembalikan = "SUDAH"
-                            changed = True
-
-                        if changed:
-                            db.commit()
-                        status = f"{action.upper()}_SUCCESS"
-
-                    finally:
-                        db.close()
+                    # same person still in front of the kiosk -> already recorded
+                    if action not in track.logged:
+                        log_writer.record(student.get("id"), tipe, action)
+                        track.logged.add(action)
+
+                    status = f"{action.upper()}_SUCCESS"
 
                 results_list.append({"name": name, "status": status})
 
-            await websocket.send_json({"results": results_list})
+            await websocket.send_json({"seq": frame.seq, "results": results_list, "stats": session_stats()})
 
     except WebSocketDisconnect:
         print("❌ Client disconnected")
     except Exception as e:
         print("Error in process_log:", e)
     finally:
+        reader_task.cancel()
+        print(f"📊 {tipe} session frames:", session_stats())
         return
@@ -1,9 +1,46 @@
+import zipfile
+from datetime import date
+from typing import List
 from fastapi import UploadFile, File, Form, HTTPException, Query
-import numpy as np
-import cv2
-from app.database import SessionLocal
-from app.models import Student, LogBook, Branch
-from app.services.face_service import get_face_encoding
+from fastapi.responses import StreamingResponse
+from app.database import SessionLocal, run_in_db
+from app.models import Student, Branch
+from app.services.inference_service import get_inference_pool, encode_single_face, InferenceError
+from app.services.logbook_service import list_logs, stream_logs, EXPORT_FORMATS
+from app.services.log_summary_service import get_summary
+from app.services.enrollment_service import (
+    ImageTooLarge, ManifestError, MAX_IMAGE_BYTES, attach_images, enroll, parse_manifest,
+)
+from app.utils.cache_utils import cache_upsert_student, cache_remove_student
+from app.utils.pagination import PageParams, filter_date_range, paginate
+
+
+async def encode_upload(img_bytes: bytes):
+    try:
+        return await get_inference_pool().run(encode_single_face, img_bytes)
+    except InferenceError as e:
+        raise HTTPException(status_code=503, detail=f"Face encoder unavailable: {e}")
+
+
+async def write_through(op, *args):
+    # the DB commit already succeeded; a cache failure is healed by the periodic refresh
+    try:
+        await op(*args)
+    except Exception as e:
+        print("⚠️ Student cache write-through failed:", e)
+
+
+def _too_large() -> bytes:
+    raise ImageTooLarge(f"over {MAX_IMAGE_BYTES} bytes")
+
+
+def _read_upload(f: UploadFile) -> bytes:
+    """Whole upload, or ImageTooLarge; never silently truncated."""
+    f.file.seek(0)
+    data = f.file.read(MAX_IMAGE_BYTES + 1)
+    if len(data) > MAX_IMAGE_BYTES:
+        raise ImageTooLarge(f"over {MAX_IMAGE_BYTES} bytes")
+    return data
 
 
 class StudentController:
@@ -11,18 +48,15 @@ class StudentController:
     async def register_user(name: str, file: UploadFile, tipe_class: str, branch_id: int):
         db = SessionLocal()
         try:
-            branch = db.query(Branch).filter(Branch.id == branch_id).first()
+            branch = await run_in_db(db.query(Branch).filter(Branch.id == branch_id).first)
             if not branch:
                 raise HTTPException(status_code=404, detail="Branch not found")
 
             img_bytes = await file.read()
-            np_arr = np.frombuffer(img_bytes, np.uint8)
-            img = cv2.imdecode(np_arr, cv2.IMREAD_COLOR)
-            rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
 
             # Encode face embedding
-            encoding = get_face_encoding(rgb)
-            if not encoding:
+            encoding = await encode_upload(img_bytes)
+            if encoding is None:
                 return {"error": "Face not detected"}
 
             student = Student(
@@ -32,8 +66,11 @@ class StudentController:
                 branch_id=branch_id
             )
             db.add(student)
-            db.commit()
-            db.refresh(student)
+            branch_name = branch.name  # read before commit expires it (no lazy SELECT on the loop)
+            await run_in_db(db.commit)
+            await run_in_db(db.refresh, student)
+
+            await write_through(cache_upsert_student, student, encoding)
 
             return {
                 "message": "User registered successfully",
@@ -41,102 +78,161 @@ class StudentController:
                     "id": student.id,
                     "name": student.name,
                     "branch_id": student.branch_id,
-                    "branch_name": branch.name,
+                    "branch_name": branch_name,
                 },
             }
         finally:
-            db.close()
+            await run_in_db(db.close)
 
     @staticmethod
-    def get_all_laptop_logs(branch_id: int | None = None):
-        db = SessionLocal()
+    async def bulk_register(
+        archive: UploadFile | None = None,
+        manifest: UploadFile | None = None,
+        files: List[UploadFile] | None = None,
+        branch_id: int | None = None,
+    ):
+        """Enroll many students from a zip (manifest CSV + photos) or a multipart batch."""
+        loaders = {}
+        if archive is not None:
+            try:
+                zf = zipfile.ZipFile(archive.file)
+            except zipfile.BadZipFile:
+                raise HTTPException(status_code=400, detail="archive is not a zip file")
+            members = [m for m in zf.infolist() if not m.is_dir() and not m.filename.startswith("__MACOSX/")]
+            csvs = [m for m in members if m.filename.lower().endswith(".csv")]
+            if len(csvs) != 1:
+                raise HTTPException(status_code=400, detail="archive must contain exactly one manifest .csv")
+            manifest_bytes = zf.read(csvs[0])
+            for m in members:
+                if m is not csvs[0]:
+                    loaders[m.filename] = (lambda m=m: zf.read(m)) if m.file_size <= MAX_IMAGE_BYTES else _too_large
+        elif manifest is not None:
+            manifest_bytes = await manifest.read()
+            for f in files or []:
+                loaders[f.filename] = lambda f=f: _read_upload(f)
+        else:
+            raise HTTPException(status_code=400, detail="send either archive or manifest + files")
+
         try:
-            query = db.query(LogBook).filter(LogBook.tipe == "LAPTOP").join(Student)
-            if branch_id:
-                query = query.filter(Student.branch_id == branch_id)
+            items = parse_manifest(manifest_bytes.decode("utf-8-sig"), default_branch_id=branch_id)
+        except (ManifestError, UnicodeDecodeError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid manifest: {e}")
+        attach_images(items, loaders)
 
-            records = query.all()
-            result = [
-                {
-                    "id": r.id,
-                    "student_id": r.student_id,
-                    "name": r.student.name if r.student else None,
-                    "tipe": r.tipe,
-                    "mengambil": r.mengambil,
-                    "mengembalikan": r.mengembalikan,
-                    "created_at": r.created_at.strftime("%Y-%m-%d %H:%M:%S"),
-                    "branch_id": r.student.branch_id if r.student else None,
-                }
-                for r in records
-            ]
-            return {"log-laptop": result}
+        report = await enroll(items, get_inference_pool())
+        return report.as_dict()
+
+    @staticmethod
+    def get_logs(tipe: str, page: PageParams, branch_id: int | None = None):
+        db = SessionLocal()
+        try:
+            items, next_cursor = list_logs(db, page, tipe=tipe, branch_id=branch_id)
+            # response key stays "log-laptop" / "log-hp"; next_cursor only for paged requests
+            if not page.paged:
+                return {f"log-{tipe.lower()}": items}
+            return {f"log-{tipe.lower()}": items, "next_cursor": next_cursor}
         finally:
             db.close()
 
     @staticmethod
-    def get_all_hp_logs(branch_id: int | None = None):
+    def export_logs(
+        tipe: str,
+        fmt: str = "csv",
+        branch_id: int | None = None,
+        date_from: date | None = None,
+        date_to: date | None = None,
+    ):
+        if fmt not in EXPORT_FORMATS:
+            raise HTTPException(status_code=400, detail="format must be csv or ndjson")
+
+        def chunks():
+            # runs in the response's threadpool iteration, after the handler returned
+            db = SessionLocal()
+            try:
+                yield from stream_logs(db, fmt, tipe, branch_id, date_from, date_to)
+            finally:
+                db.close()
+
+        filename = f"log-{tipe.lower()}-{date.today().isoformat()}.{fmt}"
+        return StreamingResponse(
+            chunks(),
+            media_type=EXPORT_FORMATS[fmt],
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+        )
+
+    @staticmethod
+    def get_log_summary(
+        date_from: date | None = None,
+        date_to: date | None = None,
+        tipe: str | None = None,
+        branch_id: int | None = None,
+    ):
+        date_to = date_to or date.today()
+        date_from = date_from or date_to
+        if date_from > date_to:
+            raise HTTPException(status_code=400, detail="date_from is after date_to")
+
         db = SessionLocal()
         try:
-            query = db.query(LogBook).filter(LogBook.tipe == "HP").join(Student)
-            if branch_id:
-                query = query.filter(Student.branch_id == branch_id)
-
-            records = query.all()
-            result = [
-                {
-                    "id": r.id,
-                    "student_id": r.student_id,
-                    "name": r.student.name if r.student else None,
-                    "tipe": r.tipe,
-                    "mengambil": r.mengambil,
-                    "mengembalikan": r.mengembalikan,
-                    "created_at": r.created_at.strftime("%Y-%m-%d %H:%M:%S"),
-                    "branch_id": r.student.branch_id if r.student else None,
-                }
-                for r in records
-            ]
-            return {"log-hp": result}
+            return {"summary": get_summary(db, date_from, date_to, tipe=tipe, branch_id=branch_id)}
         finally:
             db.close()
 
     @staticmethod
-    def get_all_students(branch_id: int | None = None):
+    def get_all_students(page: PageParams, branch_id: int | None = None):
         db = SessionLocal()
         try:
-            query = db.query(Student)
+            # only the listed columns; face_embedding stays in the database
+            query = (
+                db.query(
+                    Student.id,
+                    Student.name,
+                    Student.tipe_class,
+                    Student.branch_id,
+                    Branch.name.label("branch_name"),
+                    Student.created_at,
+                )
+                .outerjoin(Branch, Branch.id == Student.branch_id)
+            )
             if branch_id:
                 query = query.filter(Student.branch_id == branch_id)
+            query = filter_date_range(query, Student.created_at, page)
 
-            users = query.all()
+            users, next_cursor = paginate(query, Student.created_at, Student.id, page)
             result = [
                 {
                     "id": u.id,
                     "name": u.name,
                     "tipe_class": u.tipe_class,
                     "branch_id": u.branch_id,
-                    "branch_name": u.branch.name if u.branch else None,
+                    "branch_name": u.branch_name,
                 }
                 for u in users
             ]
-            return {"users": result}
+            if not page.paged:
+                return {"users": result}
+            return {"users": result, "next_cursor": next_cursor}
         finally:
             db.close()
     
     @staticmethod
-    def delete_student(student_id: int):
+    async def delete_student(student_id: int):
         db = SessionLocal()
         try:
-            student = db.query(Student).filter(Student.id == student_id).first()
+            student = await run_in_db(db.query(Student).filter(Student.id == student_id).first)
 
             if not student:
                 raise HTTPException(status_code=404, detail="Student not found")
 
+            branch_id = student.branch_id
             db.delete(student)
-            db.commit()
+            await run_in_db(db.commit)
+
+            await write_through(cache_remove_student, student_id, branch_id)
 
             return {"message": f"Student with ID {student_id} deleted successfully"}
         finally:
-            db.close()
+            await run_in_db(db.close)
 
     
     @staticmethod
@@ -149,7 +245,7 @@ class StudentController:
     ):
         db = SessionLocal()
         try:
-            student = db.query(Student).filter(Student.id == student_id).first()
+            student = await run_in_db(db.query(Student).filter(Student.id == student_id).first)
             if not student:
                 raise HTTPException(status_code=404, detail="Student not found")
 
@@ -168,31 +264,36 @@ class StudentController:
 
             # ✅ Cek apakah branch berubah, lalu validasi
             if branch_id != student.branch_id:
-                branch = db.query(Branch).filter(Branch.id == branch_id).first()
+                branch = await run_in_db(db.query(Branch).filter(Branch.id == branch_id).first)
                 if not branch:
                     raise HTTPException(status_code=404, detail="Branch not found")
             else:
-                branch = student.branch
+                branch = await run_in_db(getattr, student, "branch")  # lazy load
 
             # ✅ Jika ada file baru → update face embedding
             if file is not None:
                 img_bytes = await file.read()
                 if img_bytes:  # hanya update jika file benar-benar dikirim
-                    np_arr = np.frombuffer(img_bytes, np.uint8)
-                    img = cv2.imdecode(np_arr, cv2.IMREAD_COLOR)
-                    rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-                    encoding = get_face_encoding(rgb)
-                    if not encoding:
+                    encoding = await encode_upload(img_bytes)
+                    if encoding is None:
                         raise HTTPException(status_code=400, detail="Face not detected")
                     student.face_embedding = encoding
 
+            old_branch_id = student.branch_id
+
             # ✅ Update field lain
             student.name = name
             student.tipe_class = tipe_class
             student.branch_id = branch_id
+            branch_name = branch.name if branch else None  # read before commit expires it
 
-            db.commit()
-            db.refresh(student)
+            await run_in_db(db.commit)
+            await run_in_db(db.refresh, student)
+
+            if old_branch_id != student.branch_id:
+                await write_through(cache_remove_student, student.id, old_branch_id)
+            if student.face_embedding is not None:
+                await write_through(cache_upsert_student, student, student.face_embedding)
 
             return {
                 "message": "Student updated successfully",
@@ -201,12 +302,12 @@ class StudentController:
                     "name": student.name,
                     "tipe_class": student.tipe_class,
                     "branch_id": student.branch_id,
-                    "branch_name": branch.name if branch else None,
+                    "branch_name": branch_name,
                 },
             }
 
         finally:
-            db.close()
+            await run_in_db(db.close)
 
     
     
@@ -1,8 +1,11 @@
 from fastapi import HTTPException
 from datetime import datetime
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from app.database import SessionLocal
 from app.models import User, UserRole, Role
+from app.utils.pagination import PageParams, filter_date_range, paginate
+from app.utils.auth_cache import invalidate_user
 import bcrypt
 
 
@@ -56,34 +59,48 @@ def create_user(data):
 # =========================
 # GET ALL USERS
 # =========================
-def get_users():
+def get_users(page: PageParams, branch_id: int | None = None):
     db: Session = SessionLocal()
     try:
+        # role as a correlated subquery: one round trip for the whole list
+        role_name = (
+            select(Role.name)
+            .join(UserRole, Role.id == UserRole.role_id)
+            .where(UserRole.user_id == User.id)
+            .limit(1)
+            .scalar_subquery()
+        )
         users = (
-            db.query(User)
+            db.query(
+                User.id,
+                User.name,
+                User.email,
+                User.branch_id,
+                User.is_active,
+                role_name.label("role"),
+                User.created_at,
+            )
             .filter(User.deleted_at == None)
-            .all()
         )
+        if branch_id:
+            users = users.filter(User.branch_id == branch_id)
+        users = filter_date_range(users, User.created_at, page)
+        users, next_cursor = paginate(users, User.created_at, User.id, page)
 
-        result = []
-        for u in users:
-            role = (
-                db.query(Role.name)
-                .join(UserRole, Role.id == UserRole.role_id)
-                .filter(UserRole.user_id == u.id)
-                .first()
-            )
-
-            result.append({
+        result = [
+            {
                 "id": str(u.id),
                 "name": u.name,
                 "email": u.email,
                 "branch_id": u.branch_id,
                 "is_active": u.is_active,
-                "role": role.name if role else None,
-            })
-
-        return result
+                "role": u.role,
+            }
+            for u in users
+        ]
+        if not page.paged:
+            return result  # unpaged clients get the original bare list
+        return {"users": result, "next_cursor": next_cursor}
 
     finally:
         db.close()
@@ -155,6 +172,7 @@ def update_user(user_id: str, data):
             db.add(new_role)
 
         db.commit()
+        invalidate_user(user_id)  # cached roles and principal
         return {"message": "User updated successfully"}
 
     finally:
@@ -174,6 +192,7 @@ def delete_user(user_id: str):
         user.deleted_at = datetime.utcnow()
 
         db.commit()
+        invalidate_user(user_id)
 
         return {"message": "User deleted successfully"}
 
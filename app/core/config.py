@@ -5,3 +5,34 @@ load_dotenv()
 
 ORIGINS = [o for o in os.getenv("ALLOWED_ORIGINS", "").split(",") if o]
 ALLOW_ALL = len(ORIGINS) == 0
+
+# Face inference executor. INFERENCE_WORKERS=0 runs dlib in a thread instead of child processes.
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", str(min(2, os.cpu_count() or 1))))
+INFERENCE_MAX_PENDING = int(os.getenv("INFERENCE_MAX_PENDING", str(max(1, INFERENCE_WORKERS) * 2)))
+INFERENCE_TIMEOUT = float(os.getenv("INFERENCE_TIMEOUT", "10"))
+FRAME_SCALE = float(os.getenv("FRAME_SCALE", "0.5"))
+
+# Kiosk sessions keep only the newest pending frame; frames older than this (seconds) are skipped.
+FRAME_MAX_AGE = float(os.getenv("FRAME_MAX_AGE", "2"))
+
+# Cross-frame face tracking: confirmed tracks reuse their identity until confidence decays.
+TRACK_MIN_IOU = float(os.getenv("TRACK_MIN_IOU", "0.3"))
+TRACK_DECAY = float(os.getenv("TRACK_DECAY", "0.85"))
+TRACK_MIN_CONFIDENCE = float(os.getenv("TRACK_MIN_CONFIDENCE", "0.5"))
+TRACK_MAX_MISSES = int(os.getenv("TRACK_MAX_MISSES", "2"))
+
+# Write-behind LogBook writer: recognitions are batched and flushed once per interval (seconds).
+LOG_FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_INTERVAL", "1"))
+# An entry whose flushes keep failing (e.g. the database is down) is dropped after this many attempts.
+LOG_FLUSH_MAX_ATTEMPTS = int(os.getenv("LOG_FLUSH_MAX_ATTEMPTS", "30"))
+
+# Approximate matching: galleries with at least ANN_MIN_GALLERY students use an IVF index
+# (0 = always exact). NPROBE cells are scanned and the best RERANK candidates re-scored exactly.
+ANN_MIN_GALLERY = int(os.getenv("ANN_MIN_GALLERY", "20000"))
+ANN_NPROBE = int(os.getenv("ANN_NPROBE", "8"))
+ANN_RERANK = int(os.getenv("ANN_RERANK", "64"))
+ANN_QUANTIZE = os.getenv("ANN_QUANTIZE", "false").lower() in ("1", "true", "yes")
+
+# Gallery matrices are shared by every worker on the host through read-only mmap'd files in this
+# directory (tmpfs recommended; empty = keep a private copy per worker).
+GALLERY_SHM_DIR = os.getenv("GALLERY_SHM_DIR", "/dev/shm/logcam-gallery")
@@ -0,0 +1,78 @@
+import asyncio
+
+from app.database import init_db, warm_db_pool
+from app.services.inference_service import get_inference_pool
+from app.utils.cache_utils import ensure_students_cache
+
+COMPONENTS = ("db", "models", "gallery")
+
+
+class Readiness:
+    """What this worker has finished loading; /readyz is 200 only when all of it is."""
+
+    def __init__(self):
+        self.components = {name: False for name in COMPONENTS}
+        self.errors: dict[str, str] = {}
+
+    def mark(self, name: str, error: Exception | None = None):
+        self.components[name] = error is None
+        if error is None:
+            self.errors.pop(name, None)
+        else:
+            self.errors[name] = str(error) or type(error).__name__
+
+    @property
+    def ready(self) -> bool:
+        return all(self.components.values())
+
+    def status(self) -> dict:
+        return {"ready": self.ready, "components": dict(self.components), "errors": dict(self.errors)}
+
+
+readiness = Readiness()
+
+
+async def _step(name: str, fn):
+    try:
+        await fn()
+        readiness.mark(name)
+        print(f"✅ Ready: {name}")
+    except Exception as e:
+        readiness.mark(name, e)
+        print(f"⚠️ Not ready: {name}:", e)
+
+
+async def _db():
+    await asyncio.to_thread(init_db)
+    await asyncio.to_thread(warm_db_pool)
+
+
+async def _models():
+    workers = await get_inference_pool().warm_up()
+    print(f"🔁 Face models loaded in {workers} worker(s)")
+
+
+async def _gallery():
+    if await ensure_students_cache():
+        print("✅ Students cache seeded")
+
+
+async def warm_up():
+    """Schema + DB pool, face models and the gallery cache, retried until all are up."""
+    delay = 1.0
+    while not readiness.ready:
+        # model loading is CPU work in the pool; overlap it with the DB/redis steps
+        models = None
+        if not readiness.components["models"]:
+            models = asyncio.ensure_future(_step("models", _models))
+        if not readiness.components["db"]:
+            await _step("db", _db)
+        # the gallery is seeded from the database
+        if readiness.components["db"] and not readiness.components["gallery"]:
+            await _step("gallery", _gallery)
+        if models is not None:
+            await models
+
+        if not readiness.ready:
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30.0)
@@ -1,18 +1,37 @@
-from app.utils.redis_client import get_redis
+from app.utils.redis_client import get_redis, get_redis_raw
+from app.services.inference_service import get_inference_pool
+from app.services.log_writer import get_log_writer
+from app.services.gallery import get_gallery_registry
 import asyncio
 
 async def shutdown_event():
     from app.main import app
 
-    task = getattr(app.state, "cache_refresher_task", None)
-    if task:
-        task.cancel()
-        try:
-            await task
-        except asyncio.CancelledError:
-            pass
+    for name in ("warm_up_task", "cache_refresher_task", "event_listener_task"):
+        task = getattr(app.state, name, None)
+        if task:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    get_inference_pool().shutdown()
+
+    try:
+        # files only this worker mapped; the ones other workers still use stay
+        await asyncio.to_thread(get_gallery_registry().store.sweep)
+    except Exception as e:
+        print("⚠️ Shared gallery sweep failed:", e)
+
+    try:
+        await get_log_writer().stop()
+        print("✅ LogBook writer flushed")
+    except Exception as e:
+        print("⚠️ LogBook writer flush failed:", e)
 
     try:
+        await get_redis_raw().close()
         redis = get_redis()
         await redis.close()
         await redis.wait_closed()
@@ -1,6 +1,10 @@
 import asyncio
 from app.utils.redis_client import get_redis
-from app.utils.cache_utils import seed_students_cache
+from app.utils.cache_utils import refresh_students_cache_if_stale, REFRESH_INTERVAL
+from app.core.readiness import warm_up
+from app.services.log_writer import get_log_writer
+from app.services.gallery import get_gallery_registry
+from app.utils import events, auth_cache
 
 
 async def startup_event():
@@ -12,18 +16,14 @@ async def startup_event():
         print("⚠️ Redis not available:", e)
         redis = None
 
-    try:
-        await seed_students_cache()
-        print("✅ Students cache seeded")
-    except Exception as e:
-        print("⚠️ Failed to seed students cache:", e)
+    get_log_writer().start()
 
     async def refresher():
         while True:
             try:
-                await asyncio.sleep(300)
-                await seed_students_cache()
-                print("🔁 Students cache refreshed")
+                await asyncio.sleep(REFRESH_INTERVAL)
+                if await refresh_students_cache_if_stale():
+                    print("🔁 Students cache refreshed")
             except asyncio.CancelledError:
                 break
             except Exception as e:
@@ -31,4 +31,17 @@ async def startup_event():
                 await asyncio.sleep(3)
 
     from app.main import app
+    # schema, DB pool, face models and gallery cache load in the background; /readyz reports progress
+    app.state.warm_up_task = asyncio.create_task(warm_up())
     app.state.cache_refresher_task = asyncio.create_task(refresher())
+
+    # live gallery deltas for open kiosk sessions
+    galleries = get_gallery_registry()
+    try:
+        swept = await asyncio.to_thread(galleries.store.sweep)
+        if swept:
+            print(f"🧹 Removed {swept} stale shared gallery files")
+    except Exception as e:
+        print("⚠️ Shared gallery sweep failed:", e)
+    auth_cache.install()
+    app.state.event_listener_task = asyncio.create_task(events.listen())
@@ -1,8 +1,13 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import contextvars
+import functools
 import os
 from app.models.base import Base
+from app.utils.db_metrics import InstrumentedQueuePool, instrument_engine
 
 load_dotenv()
 
@@ -14,8 +19,54 @@ DB_NAME = os.getenv("DB_NAME", "shiners_lms_db")
 
 DATABASE_URL = f"postgresql+psycopg2://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
-engine = create_engine(DATABASE_URL)
+# Async handlers run blocking ORM work on this executor (see run_in_db). The pool keeps
+# one connection per executor thread on top of what the sync endpoints' threadpool uses.
+DB_EXECUTOR_WORKERS = int(os.getenv("DB_EXECUTOR_WORKERS", "8"))
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", str(max(5, DB_EXECUTOR_WORKERS))))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+engine = create_engine(
+    DATABASE_URL,
+    poolclass=InstrumentedQueuePool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING,
+)
+instrument_engine(engine)
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
 
+_db_executor = ThreadPoolExecutor(max_workers=DB_EXECUTOR_WORKERS, thread_name_prefix="db")
+
+
+async def run_in_db(fn, *args, **kwargs):
+    """Run a blocking DB call on the DB executor so the event loop keeps serving sockets."""
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(_db_executor, functools.partial(ctx.run, fn, *args, **kwargs))
+
+
 def init_db():
+    from app.migrations import run_migrations
+
     Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+
+
+def warm_db_pool(connections: int = 2) -> int:
+    """Open a few pooled connections up front and check they answer."""
+    conns = []
+    try:
+        for _ in range(min(connections, DB_POOL_SIZE)):
+            conn = engine.connect()
+            conns.append(conn)
+            conn.execute(text("SELECT 1"))
+        return len(conns)
+    finally:
+        for conn in conns:
+            conn.close()
@@ -1,20 +1,21 @@
 from fastapi import FastAPI
-from fastapi.responses import PlainTextResponse
+from fastapi.responses import PlainTextResponse, JSONResponse
 
 from app.core.cors import setup_cors
 from app.core.startup import startup_event
 from app.core.shutdown import shutdown_event
 
-from app.database import init_db
-from app.routes import log_routes, student_routes, branch_routes, user_routes, auth_routes, role_routes
+from app.core.readiness import readiness
+from app.routes import log_routes, student_routes, branch_routes, user_routes, auth_routes, role_routes, metrics_routes
 from app.middleware.admin_middleware import AdminMiddleware
+from app.middleware.query_stats_middleware import QueryStatsMiddleware
 
 
 app = FastAPI(root_path="/api", docs_url="/docs", openapi_url="/openapi.json")
 
 setup_cors(app)
 
-init_db()
+# schema creation and model loading run in the startup warm-up, not at import
 
 app.include_router(student_routes.router)
 app.include_router(branch_routes.router)
@@ -22,8 +23,10 @@ app.include_router(log_routes.router)
 app.include_router(auth_routes.router)
 app.include_router(user_routes.router)
 app.include_router(role_routes.router)
+app.include_router(metrics_routes.router)
 
 app.add_middleware(AdminMiddleware)
+app.add_middleware(QueryStatsMiddleware)  # outermost, so middleware queries are counted too
 
 app.on_event("startup")(startup_event)
 app.on_event("shutdown")(shutdown_event)
@@ -31,6 +34,13 @@ app.on_event("shutdown")(shutdown_event)
 
 @app.get("/healthz", response_class=PlainTextResponse)
 def healthz():
+    # liveness only; see /readyz
+    return "ok"
 
-    return {"status": "ok"}
+
+@app.get("/readyz")
+def readyz():
+    # 503 until DB pool, face models and gallery cache are loaded in this worker
+    status = readiness.status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
 
@@ -1,60 +1,70 @@
-from fastapi import Request
 from fastapi.responses import JSONResponse
 from jose import jwt, JWTError
-from starlette.middleware.base import BaseHTTPMiddleware
-from sqlalchemy import select
-from app.database import SessionLocal
-from app.models import Role, UserRole
+from starlette.requests import HTTPConnection
+from app.database import run_in_db
+from app.utils.auth_cache import role_cache, load_user_roles
+from app.utils.ttl_cache import MISSING
 from dotenv import load_dotenv
 import os
 
 load_dotenv()
 
+PUBLIC_PATHS = (
+    "/auth/login", "/students/all", "/students/all/log-hp", "/students/all/log-laptop", "/docs", "/api/openapi.json",
+    "/healthz", "/readyz", "/api/healthz", "/api/readyz",
+)
+
+
+async def get_user_roles(user_id: str) -> tuple:
+    roles = role_cache.get(user_id)
+    if roles is MISSING:
+        roles = await run_in_db(load_user_roles, user_id)
+        role_cache.set(user_id, roles)
+    return roles
+
+
+class AdminMiddleware:
+    """Pure ASGI ADMIN gate: only the role lookup can touch the DB, and it is cached."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS":
+            return await self.app(scope, receive, send)
+
+        conn = HTTPConnection(scope)
+        if conn.url.path.startswith(PUBLIC_PATHS):
+            return await self.app(scope, receive, send)
+
+        auth_header = conn.headers.get("Authorization")
+        if not auth_header or not auth_header.startswith("Bearer "):
+            return await self._reject(401, "Authorization token required", scope, receive, send)
+
+        token = auth_header.split(" ")[1]
 
-class AdminMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        db = SessionLocal()
         try:
-            if request.method == "OPTIONS":
-                return await call_next(request)
-                
-            public_paths = ["/auth/login", "/students/all", "/students/all/log-hp", "/students/all/log-laptop", "/docs", "/api/openapi.json"]
-            if any(request.url.path.startswith(p) for p in public_paths):
-                return await call_next(request)
-
-            auth_header = request.headers.get("Authorization")
-            if not auth_header or not auth_header.startswith("Bearer "):
-                return JSONResponse(status_code=401, content={"message": "Authorization token required"})
-
-            token = auth_header.split(" ")[1]
-
-            try:
-                payload = jwt.decode(
-                    token,
-                    os.getenv("JWT_SECRET_KEY", "supersecretkey"),
-                    algorithms=["HS256"]
-                )
-                user_id = payload.get("sub") 
-                if not user_id:
-                    raise JWTError("Invalid token payload")
-            except JWTError:
-                return JSONResponse(status_code=401, content={"message": "Invalid or expired token"})
-
-            stmt = (
-                select(Role.name)
-                .join(UserRole, Role.id == UserRole.role_id)
-                .filter(UserRole.user_id == user_id)
+            payload = jwt.decode(
+                token,
+                os.getenv("JWT_SECRET_KEY", "supersecretkey"),
+                algorithms=["HS256"]
             )
+            user_id = payload.get("sub")
+            if not user_id:
+                raise JWTError("Invalid token payload")
+        except JWTError:
+            return await self._reject(401, "Invalid or expired token", scope, receive, send)
 
-            roles = [r[0] for r in db.execute(stmt).all()]
+        roles = await get_user_roles(user_id)
 
-            if "ADMIN" not in roles:
-                return JSONResponse(status_code=403, content={"message": "Access forbidden: ADMIN role required"})
+        if "ADMIN" not in roles:
+            return await self._reject(403, "Access forbidden: ADMIN role required", scope, receive, send)
 
-            request.state.user = payload
+        scope.setdefault("state", {})["user"] = payload  # request.state.user
 
-            response = await call_next(request)
-            return response
+        await self.app(scope, receive, send)
 
-        finally:
-            db.close()
+    @staticmethod
+    async def _reject(status_code, message, scope, receive, send):
+        response = JSONResponse(status_code=status_code, content={"message": message})
+        await response(scope, receive, send)
@@ -0,0 +1,34 @@
+from app.utils.db_metrics import QueryStats, request_query_stats
+
+
+class QueryStatsMiddleware:
+    """Pure ASGI middleware attaching per-request SQL counters.
+
+    Adds ``X-DB-Queries`` / ``X-DB-Time-Ms`` response headers and logs
+    requests that hit a slow query.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = QueryStats()
+        token = request_query_stats.set(stats)
+
+        async def send_with_stats(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-db-queries", str(stats.count).encode()))
+                headers.append((b"x-db-time-ms", f"{stats.total_ms:.1f}".encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            request_query_stats.reset(token)
+            if stats.slow:
+                print(f"🐢 {scope['method']} {scope['path']}: {stats.count} queries, {stats.total_ms:.1f} ms", stats.slow)
@@ -0,0 +1,37 @@
+# app/migrations/__init__.py
+"""Minimal forward-only schema migrations.
+
+``create_all`` only creates missing tables, so changes to existing tables
+live here. Each migration is an idempotent ``upgrade(conn)`` and is
+recorded in ``schema_migrations``; an advisory lock keeps several
+uvicorn workers from running them at the same time.
+"""
+from sqlalchemy import text
+
+from app.migrations import v0001_logbook_daily_key, v0002_student_embedding_bytea, v0003_listing_indexes, v0004_log_daily_summaries
+
+MIGRATIONS = [
+    ("0001_logbook_daily_key", v0001_logbook_daily_key.upgrade),
+    ("0002_student_embedding_bytea", v0002_student_embedding_bytea.upgrade),
+    ("0003_listing_indexes", v0003_listing_indexes.upgrade),
+    ("0004_log_daily_summaries", v0004_log_daily_summaries.upgrade),
+]
+
+_LOCK_KEY = 0x6C6F6763  # "logc"
+
+
+def run_migrations(engine):
+    with engine.begin() as conn:
+        conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _LOCK_KEY})
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            " name VARCHAR(100) PRIMARY KEY,"
+            " applied_at TIMESTAMP NOT NULL DEFAULT now())"
+        ))
+        applied = {r[0] for r in conn.execute(text("SELECT name FROM schema_migrations"))}
+        for name, upgrade in MIGRATIONS:
+            if name in applied:
+                continue
+            upgrade(conn)
+            conn.execute(text("INSERT INTO schema_migrations (name) VALUES (:name)"), {"name": name})
+            print(f"✅ Migration applied: {name}")
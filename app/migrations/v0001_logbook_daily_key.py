@@ -0,0 +1,50 @@
+# Add log_books.log_date and a unique (student_id, tipe, log_date) key.
+from datetime import datetime
+
+from sqlalchemy import text
+
+
+def upgrade(conn):
+    conn.execute(text("ALTER TABLE log_books ADD COLUMN IF NOT EXISTS log_date DATE"))
+    # created_at is naive UTC, while new rows get the backend's local date.today() (WIB on the
+    # kiosks), so shift by the local UTC offset before taking the day
+    offset = datetime.now().astimezone().utcoffset().total_seconds()
+    conn.execute(text(
+        "UPDATE log_books SET log_date = (created_at + make_interval(secs => :offset))::date "
+        "WHERE log_date IS NULL AND created_at IS NOT NULL"
+    ), {"offset": offset})
+    conn.execute(text("UPDATE log_books SET log_date = CURRENT_DATE WHERE log_date IS NULL"))
+
+    # fold duplicate rows (SELECT-then-INSERT races) into the oldest one per day; rows without a
+    # student are left alone, the unique index treats their NULLs as distinct
+    conn.execute(text("""
+        WITH grouped AS (
+            SELECT MIN(id) AS keep_id, student_id, tipe, log_date,
+                   bool_or(mengambil = 'SUDAH') AS took,
+                   bool_or(mengembalikan = 'SUDAH') AS returned
+            FROM log_books
+            WHERE student_id IS NOT NULL
+            GROUP BY student_id, tipe, log_date
+            HAVING COUNT(*) > 1
+        ), merged AS (
+            UPDATE log_books l
+            SET mengambil = CASE WHEN g.took THEN 'SUDAH'::mengambil_enum ELSE l.mengambil END,
+                mengembalikan = CASE WHEN g.returned THEN 'SUDAH'::mengembalikan_enum ELSE l.mengembalikan END
+            FROM grouped g
+            WHERE l.id = g.keep_id
+            RETURNING l.id
+        )
+        DELETE FROM log_books l
+        USING grouped g
+        WHERE l.student_id = g.student_id
+          AND l.tipe = g.tipe
+          AND l.log_date = g.log_date
+          AND l.id <> g.keep_id
+    """))
+
+    conn.execute(text("ALTER TABLE log_books ALTER COLUMN log_date SET DEFAULT CURRENT_DATE"))
+    conn.execute(text("ALTER TABLE log_books ALTER COLUMN log_date SET NOT NULL"))
+    conn.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_log_books_student_tipe_day "
+        "ON log_books (student_id, tipe, log_date)"
+    ))
@@ -0,0 +1,41 @@
+# Convert students.face_embedding from JSON text to packed float32 bytea.
+import json
+
+import numpy as np
+from sqlalchemy import text
+
+from app.models.types import EMBEDDING_DTYPE
+
+BATCH = 500
+
+
+def upgrade(conn):
+    data_type = conn.execute(text(
+        "SELECT data_type FROM information_schema.columns "
+        "WHERE table_name = 'students' AND column_name = 'face_embedding'"
+    )).scalar()
+    if data_type in (None, "bytea"):
+        return
+
+    conn.execute(text("ALTER TABLE students RENAME COLUMN face_embedding TO face_embedding_json"))
+    conn.execute(text("ALTER TABLE students ADD COLUMN face_embedding BYTEA"))
+
+    last_id = 0
+    while True:
+        rows = conn.execute(text(
+            "SELECT id, face_embedding_json::text FROM students "
+            "WHERE id > :last_id AND face_embedding_json IS NOT NULL "
+            "ORDER BY id LIMIT :limit"
+        ), {"last_id": last_id, "limit": BATCH}).all()
+        if not rows:
+            break
+        params = []
+        for student_id, raw in rows:
+            values = json.loads(raw)
+            if values:
+                params.append({"id": student_id, "emb": np.asarray(values, dtype=EMBEDDING_DTYPE).tobytes()})
+        if params:
+            conn.execute(text("UPDATE students SET face_embedding = :emb WHERE id = :id"), params)
+        last_id = rows[-1][0]
+
+    conn.execute(text("ALTER TABLE students DROP COLUMN face_embedding_json"))
@@ -0,0 +1,20 @@
+# Indexes for the log/student/user listings and per-user role lookups.
+from sqlalchemy import text
+
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_log_books_tipe_created ON log_books (tipe, created_at, id)",
+    "CREATE INDEX IF NOT EXISTS ix_log_books_tipe_day ON log_books (tipe, log_date)",
+    "CREATE INDEX IF NOT EXISTS ix_students_branch_created ON students (branch_id, created_at, id)",
+    "CREATE INDEX IF NOT EXISTS ix_students_created ON students (created_at, id)",
+    "CREATE INDEX IF NOT EXISTS ix_users_active_created ON users (created_at, id) WHERE deleted_at IS NULL",
+    "CREATE INDEX IF NOT EXISTS ix_users_active_branch ON users (branch_id, created_at, id) WHERE deleted_at IS NULL",
+    "CREATE INDEX IF NOT EXISTS ix_user_roles_user_id ON user_roles (user_id)",
+]
+
+
+def upgrade(conn):
+    for ddl in INDEXES:
+        conn.execute(text(ddl))
+    conn.execute(text("ANALYZE log_books"))
+    conn.execute(text("ANALYZE students"))
+    conn.execute(text("ANALYZE users"))
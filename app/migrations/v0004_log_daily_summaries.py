@@ -0,0 +1,7 @@
+# Fill log_daily_summaries (created by create_all) from the existing history.
+from app.services.log_summary_service import rebuild_summaries
+
+
+def upgrade(conn):
+    rows = rebuild_summaries(conn)
+    print(f"📊 Backfilled {rows} daily summary rows")
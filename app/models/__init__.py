@@ -5,3 +5,4 @@ from app.models.logbook import LogBook
 from app.models.user import User
 from app.models.role import Role
 from app.models.user_role import UserRole
+from app.models.log_summary import LogDailySummary
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, Date, DateTime, Enum, ForeignKey
+from datetime import datetime
+from app.models.base import Base
+
+
+class LogDailySummary(Base):
+    """Per branch, device type and day counts, kept in step with log_books.
+
+    outstanding = rows taken (mengambil SUDAH) and not yet returned.
+    """
+    __tablename__ = "log_daily_summaries"
+
+    branch_id = Column(Integer, ForeignKey("branches.id"), primary_key=True)
+    tipe = Column(Enum("LAPTOP", "HP", name="tipe_enum"), primary_key=True)
+    log_date = Column(Date, primary_key=True)
+    taken = Column(Integer, nullable=False, default=0)
+    returned = Column(Integer, nullable=False, default=0)
+    outstanding = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
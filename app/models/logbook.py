@@ -1,15 +1,25 @@
-from sqlalchemy import Column, Integer, String, DateTime, Enum, ForeignKey
+from sqlalchemy import Column, Integer, String, Date, DateTime, Enum, ForeignKey, Index, func
 from sqlalchemy.orm import relationship
-from datetime import datetime
+from datetime import datetime, date
 from app.models.base import Base
 
 class LogBook(Base):
     __tablename__ = "log_books"
+    __table_args__ = (
+        # one row per student, device type and day; target of the ON CONFLICT upsert
+        Index("uq_log_books_student_tipe_day", "student_id", "tipe", "log_date", unique=True),
+        # dashboard listings: filter on tipe, keyset order on (created_at, id)
+        Index("ix_log_books_tipe_created", "tipe", "created_at", "id"),
+        # dashboard/export date ranges
+        Index("ix_log_books_tipe_day", "tipe", "log_date"),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
     student_id = Column(Integer, ForeignKey("students.id"))
     tipe = Column(Enum("LAPTOP", "HP", name="tipe_enum"), nullable=False)
     mengambil = Column(Enum("SUDAH", "BELUM", name="mengambil_enum"), default="BELUM")
     mengembalikan = Column(Enum("SUDAH", "BELUM", name="mengembalikan_enum"), default="BELUM")
+    log_date = Column(Date, nullable=False, default=date.today, server_default=func.current_date())
     created_at = Column(DateTime, default=datetime.utcnow)
 
     student = relationship("Student", back_populates="logs")
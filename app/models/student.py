@@ -1,15 +1,21 @@
-from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.models import Base
+from app.models.types import Embedding
 
 class Student(Base):
     __tablename__ = "students"
+    __table_args__ = (
+        # per-branch galleries and listings, keyset order on (created_at, id)
+        Index("ix_students_branch_created", "branch_id", "created_at", "id"),
+        Index("ix_students_created", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(225))
-    face_embedding = Column(JSON)
+    face_embedding = Column(Embedding)  # 128 x float32, 512 bytes
     tipe_class = Column(String(225))
     created_at = Column(DateTime, default=datetime.utcnow)
 
@@ -0,0 +1,22 @@
+import numpy as np
+from sqlalchemy.types import TypeDecorator, LargeBinary
+
+# little-endian float32, so the bytes are the same on every host and in redis
+EMBEDDING_DTYPE = np.dtype("<f4")
+
+
+class Embedding(TypeDecorator):
+    """Face embedding stored as packed float32 ``bytea``; loads as a numpy array."""
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return np.asarray(value, dtype=EMBEDDING_DTYPE).tobytes()
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return np.frombuffer(value, dtype=EMBEDDING_DTYPE)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, DateTime, ForeignKey
+from sqlalchemy import Column, DateTime, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -7,6 +7,9 @@ from app.models import Base
 
 class UserRole(Base):
     __tablename__ = "user_roles"
+    __table_args__ = (
+        Index("ix_user_roles_user_id", "user_id"),  # role lookups per user
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
@@ -1,17 +1,18 @@
 # WebSocket routes for log events
 from fastapi import APIRouter, WebSocket
 from app.controllers.log_controller import process_log
+from app.utils.frame_protocol import select_subprotocol
 
 router = APIRouter(prefix="/ws", tags=["Log Books"])
 
 
 @router.websocket("/log-laptop")
 async def log_laptop_ws(websocket: WebSocket):
-    await websocket.accept()
+    await websocket.accept(subprotocol=select_subprotocol(websocket))
     await process_log(websocket, tipe="LAPTOP")
 
 
 @router.websocket("/log-hp")
 async def log_hp_ws(websocket: WebSocket):
-    await websocket.accept()
+    await websocket.accept(subprotocol=select_subprotocol(websocket))
     await process_log(websocket, tipe="HP")
\ No newline at end of file
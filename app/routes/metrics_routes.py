@@ -0,0 +1,26 @@
+from fastapi import APIRouter
+from app.database import engine
+from app.utils.db_metrics import pool_status, query_totals
+from app.utils import auth_cache
+from app.services.gallery import get_gallery_registry
+
+# not in AdminMiddleware's public paths -> ADMIN only
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+
+@router.get("/db")
+def db_metrics():
+    return {
+        "pool": pool_status(engine),
+        "queries": query_totals(),
+    }
+
+
+@router.get("/auth-cache")
+def auth_cache_metrics():
+    return auth_cache.stats()
+
+
+@router.get("/gallery")
+def gallery_metrics():
+    return get_gallery_registry().stats()
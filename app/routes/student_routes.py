@@ -1,7 +1,9 @@
+from datetime import date
 from fastapi import APIRouter, UploadFile, Depends, File, Form, Query
 from app.controllers.student_controller import StudentController
 from app.utils.auth import get_current_user
-from typing import Optional
+from app.utils.pagination import PageParams
+from typing import List, Optional
 
 router = APIRouter(prefix="/students", tags=["Students"])
 
@@ -14,33 +16,93 @@ async def register_user(
 ):
     return await StudentController.register_user(name, file, tipe_class, branch_id)
 
-def resolve_branch_id(current_user):
+@router.post("/bulk-register")
+async def bulk_register(
+    archive: Optional[UploadFile] = File(None),
+    manifest: Optional[UploadFile] = File(None),
+    files: Optional[List[UploadFile]] = File(None),
+    branch_id: Optional[int] = Form(None),
+):
+    # manifest columns: name,tipe_class,branch_id,image (branch_id falls back to the form field)
+    return await StudentController.bulk_register(archive, manifest, files, branch_id)
+
+def resolve_branch_id(current_user, requested: Optional[int] = None):
+    # admin may filter on any branch; everyone else only sees their own
     if current_user["role"].upper() == "ADMIN":
-        return None
+        return requested
     
     return current_user["branch_id"]
 
 @router.get("/all")
-def get_all_students(current_user = Depends(get_current_user)):
-    branch_id = resolve_branch_id(current_user)
-    return StudentController.get_all_students(branch_id=branch_id)
+def get_all_students(
+    page: PageParams = Depends(),
+    branch_id: Optional[int] = None,
+    current_user = Depends(get_current_user),
+):
+    branch_id = resolve_branch_id(current_user, branch_id)
+    return StudentController.get_all_students(page, branch_id=branch_id)
 
 
 @router.get("/all/log-laptop")
-def get_all_laptop_logs(current_user = Depends(get_current_user)):
-    branch_id = resolve_branch_id(current_user)
-    return StudentController.get_all_laptop_logs(branch_id=branch_id)
+def get_all_laptop_logs(
+    page: PageParams = Depends(),
+    branch_id: Optional[int] = None,
+    current_user = Depends(get_current_user),
+):
+    branch_id = resolve_branch_id(current_user, branch_id)
+    return StudentController.get_logs("LAPTOP", page, branch_id=branch_id)
 
 
 @router.get("/all/log-hp")
-def get_all_hp_logs(current_user = Depends(get_current_user)):
-    branch_id = resolve_branch_id(current_user)
-    return StudentController.get_all_hp_logs(branch_id=branch_id)
+def get_all_hp_logs(
+    page: PageParams = Depends(),
+    branch_id: Optional[int] = None,
+    current_user = Depends(get_current_user),
+):
+    branch_id = resolve_branch_id(current_user, branch_id)
+    return StudentController.get_logs("HP", page, branch_id=branch_id)
+
+
+@router.get("/all/log-laptop/export")
+def export_laptop_logs(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    branch_id: Optional[int] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    current_user = Depends(get_current_user),
+):
+    branch_id = resolve_branch_id(current_user, branch_id)
+    return StudentController.export_logs("LAPTOP", format, branch_id, date_from, date_to)
+
+
+@router.get("/all/log-hp/export")
+def export_hp_logs(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    branch_id: Optional[int] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    current_user = Depends(get_current_user),
+):
+    branch_id = resolve_branch_id(current_user, branch_id)
+    return StudentController.export_logs("HP", format, branch_id, date_from, date_to)
+
+
+@router.get("/all/log-summary")
+def get_log_summary(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    tipe: Optional[str] = Query(None, pattern="^(LAPTOP|HP)$"),
+    branch_id: Optional[int] = None,
+    current_user = Depends(get_current_user),
+):
+    # defaults to today
+    branch_id = resolve_branch_id(current_user, branch_id)
+    return StudentController.get_log_summary(date_from, date_to, tipe=tipe, branch_id=branch_id)
 
 
 @router.delete("/{student_id}")
-def delete_student(student_id: int):
-    return StudentController.delete_student(student_id)
+async def delete_student(student_id: int):
+    return await StudentController.delete_student(student_id)
 
 
 
@@ -1,8 +1,9 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 from app.controllers.user_controller import (
     create_user, get_users, get_user_by_id, update_user, delete_user
 )
 from app.schemas.user_schema import UserCreate, UserUpdate
+from app.utils.pagination import PageParams
 
 router = APIRouter(prefix="/users")
 
@@ -13,8 +14,8 @@ def create(data: UserCreate):
 
 
 @router.get("/")
-def index():
-    return get_users()
+def index(page: PageParams = Depends(), branch_id: int | None = None):
+    return get_users(page, branch_id=branch_id)
 
 
 @router.get("/{user_id}")
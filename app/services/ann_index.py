@@ -0,0 +1,195 @@
+# app/services/ann_index.py
+"""IVF approximate nearest-neighbour index for large galleries (numpy only).
+
+The gallery is split into ``nlist`` k-means cells. A query scans only the
+``nprobe`` nearest cells with cheap approximate distances (float32 or
+optional int8 codes), then the best ``rerank`` candidates are re-scored
+exactly against the original float32 matrix, so reported distances are
+always exact and only recall can suffer.
+"""
+import time
+
+import numpy as np
+
+from app.core.config import ANN_NPROBE, ANN_QUANTIZE, ANN_RERANK
+
+
+def _sq_dists(queries: np.ndarray, points: np.ndarray, point_sq: np.ndarray) -> np.ndarray:
+    q_sq = np.einsum("ij,ij->i", queries, queries)
+    sq = q_sq[:, None] + point_sq[None, :] - 2.0 * (queries @ points.T)
+    return np.maximum(sq, 0.0, out=sq)
+
+
+def kmeans(data: np.ndarray, k: int, iters: int = 10, seed: int = 0) -> np.ndarray:
+    """Plain Lloyd k-means; empty cells are re-seeded from random points."""
+    rng = np.random.default_rng(seed)
+    centroids = data[rng.choice(len(data), size=k, replace=False)].copy()
+    for _ in range(iters):
+        c_sq = np.einsum("ij,ij->i", centroids, centroids)
+        assign = np.argmin(_sq_dists(data, centroids, c_sq), axis=1)
+        order = np.argsort(assign, kind="stable")
+        counts = np.bincount(assign, minlength=k)
+        filled = counts > 0
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[filled]
+        centroids[filled] = np.add.reduceat(data[order], starts, axis=0) / counts[filled, None]
+        empty = np.flatnonzero(~filled)
+        if len(empty):
+            centroids[empty] = data[rng.choice(len(data), size=len(empty), replace=False)]
+    return centroids.astype(np.float32)
+
+
+class IVFIndex:
+    """Inverted-file index over an (n, d) float32 matrix.
+
+    ``centroids`` from a previous index can be passed to skip training,
+    which keeps rebuilds after single-student gallery deltas cheap.
+    """
+
+    def __init__(self, matrix: np.ndarray, centroids: np.ndarray | None = None, nlist: int | None = None,
+                 nprobe: int = ANN_NPROBE, quantize: bool = ANN_QUANTIZE, rerank: int = ANN_RERANK,
+                 seed: int = 0, trained_size: int | None = None):
+        self.base = matrix  # shared with the gallery, never copied
+        self.base_sq = np.einsum("ij,ij->i", matrix, matrix)
+        n = len(matrix)
+        # gallery size the centroids were trained on; rebuilds retrain once it drifts too far
+        self.trained_size = n if centroids is None else (trained_size or n)
+
+        if centroids is None:
+            nlist = nlist or max(1, int(np.sqrt(n)))
+            nlist = min(nlist, n)
+            sample = matrix
+            if n > 256 * nlist:
+                sample = matrix[np.random.default_rng(seed).choice(n, size=256 * nlist, replace=False)]
+            centroids = kmeans(sample, nlist, seed=seed)
+        self.centroids = centroids
+        self.centroid_sq = np.einsum("ij,ij->i", centroids, centroids)
+        self.nprobe = min(nprobe, len(centroids))
+        self.rerank = rerank
+
+        assign = np.argmin(_sq_dists(matrix, centroids, self.centroid_sq), axis=1)
+        self.perm = np.argsort(assign, kind="stable")  # cell-ordered position -> gallery row
+        counts = np.bincount(assign, minlength=len(centroids))
+        self.offsets = np.concatenate(([0], np.cumsum(counts)))
+
+        cell_ordered = matrix[self.perm]
+        if quantize:
+            # symmetric per-dimension int8 codes: 128 bytes per student instead of 512
+            self.scale = (np.abs(cell_ordered).max(axis=0) / 127.0).astype(np.float32) if n else np.ones(matrix.shape[1], np.float32)
+            self.scale[self.scale == 0] = 1.0
+            self.codes = np.round(cell_ordered / self.scale).astype(np.int8)
+            self.vectors = None
+            self.vectors_sq = np.einsum("ij,ij->i", self.codes * self.scale, self.codes * self.scale)
+        else:
+            self.codes = None
+            # a private copy until the owner swaps in a shared one (GalleryRegistry maps it host-wide)
+            self.vectors = np.ascontiguousarray(cell_ordered)
+            self.vectors_sq = self.base_sq[self.perm]
+
+    def __len__(self):
+        return len(self.base)
+
+    @property
+    def nlist(self) -> int:
+        return len(self.centroids)
+
+    def _scan(self, q: np.ndarray, cells) -> tuple:
+        """Approximate ||v||^2 - 2 q.v over the given cells.
+
+        Cells are contiguous slices, so nothing is gathered; int8 codes are
+        upcast to float32 by the product, one cell at a time.
+        """
+        if self.codes is not None:
+            q, data = q * self.scale, self.codes
+        else:
+            data = self.vectors
+        scores, positions = [], []
+        for c in cells:
+            lo, hi = self.offsets[c], self.offsets[c + 1]
+            if lo == hi:
+                continue
+            scores.append(self.vectors_sq[lo:hi] - 2.0 * (data[lo:hi] @ q))
+            positions.append(np.arange(lo, hi))
+        if not scores:
+            return np.empty(0, np.float32), np.empty(0, np.int64)
+        return np.concatenate(scores), np.concatenate(positions)
+
+    def search(self, queries: np.ndarray, k: int):
+        """Return (rows, distances), each (len(queries), k), nearest first.
+
+        Distances are exact; rows are -1 (distance inf) where fewer than k
+        candidates were found.
+        """
+        nq = len(queries)
+        rows = np.full((nq, k), -1, dtype=np.int64)
+        dists = np.full((nq, k), np.inf, dtype=np.float32)
+        if nq == 0 or len(self) == 0:
+            return rows, dists
+
+        cell_d = _sq_dists(queries, self.centroids, self.centroid_sq)
+        if self.nprobe < self.nlist:
+            probes = np.argpartition(cell_d, self.nprobe - 1, axis=1)[:, :self.nprobe]
+        else:
+            probes = np.broadcast_to(np.arange(self.nlist), (nq, self.nlist))
+
+        for qi in range(nq):
+            q = queries[qi:qi + 1]
+            approx, positions = self._scan(queries[qi], probes[qi])
+            if len(positions) == 0:
+                continue
+            keep = min(max(self.rerank, k), len(positions))
+            if keep < len(positions):
+                best = np.argpartition(approx, keep - 1)[:keep]
+                positions = positions[best]
+
+            cand = self.perm[positions]
+            exact = np.sqrt(_sq_dists(q, self.base[cand], self.base_sq[cand])[0])
+            top = np.argsort(exact)[:k]
+            rows[qi, :len(top)] = cand[top]
+            dists[qi, :len(top)] = exact[top]
+        return rows, dists
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self),
+            "nlist": self.nlist,
+            "nprobe": self.nprobe,
+            "rerank": self.rerank,
+            "quantized": self.codes is not None,
+        }
+
+
+def evaluate(matrix: np.ndarray, queries: np.ndarray, k: int = 1, repeat: int = 3, **index_kwargs) -> dict:
+    """Recall@k and per-query latency of IVFIndex against exact search."""
+    from app.services.face_matcher import FaceMatcher
+
+    exact = FaceMatcher(matrix, [None] * len(matrix), ann=False)
+    t = time.perf_counter()
+    index = IVFIndex(matrix, **index_kwargs)
+    build_ms = (time.perf_counter() - t) * 1000
+
+    def timed(fn):
+        best = float("inf")
+        for _ in range(repeat):
+            t = time.perf_counter()
+            for q in queries:
+                fn(q[None, :])
+            best = min(best, (time.perf_counter() - t) * 1000 / len(queries))
+        return best
+
+    exact_ms = timed(lambda q: exact.distances(q).argmin())
+    ann_ms = timed(lambda q: index.search(q, k))
+
+    truth = np.argsort(exact.distances(queries), axis=1)[:, :k]
+    found, _ = index.search(queries, k)
+    hits = sum(len(set(t) & set(f)) for t, f in zip(truth, found))
+    return {
+        "gallery": len(matrix),
+        "queries": len(queries),
+        "k": k,
+        **index.stats(),
+        "build_ms": round(build_ms, 1),
+        "exact_ms_per_query": round(exact_ms, 4),
+        "ann_ms_per_query": round(ann_ms, 4),
+        "speedup": round(exact_ms / ann_ms, 2) if ann_ms else None,
+        "recall": round(hits / (len(queries) * k), 4),
+    }
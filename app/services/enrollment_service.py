@@ -0,0 +1,194 @@
+# app/services/enrollment_service.py
+"""Bulk student enrollment shared by the upload endpoint and the CLI.
+
+A manifest CSV (``name,tipe_class,branch_id,image``) names one photo per
+student. Photos are encoded concurrently on an InferencePool, students
+with a face are inserted in batches, and the gallery cache is reseeded once
+at the end. Every manifest row gets an entry in the report.
+"""
+import asyncio
+import csv
+import io
+import os
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import insert, select
+
+from app.database import SessionLocal, run_in_db
+from app.models import Branch, Student
+from app.services.inference_service import InferenceError, InferencePool, encode_single_face
+from app.utils.cache_utils import reseed_students_cache
+
+ENROLL_MAX_ROWS = int(os.getenv("ENROLL_MAX_ROWS", "2000"))
+ENROLL_BATCH_SIZE = 200
+ENROLL_TIMEOUT = float(os.getenv("ENROLL_TIMEOUT", "60"))  # per photo, includes queueing
+MAX_IMAGE_BYTES = 10 * 1024 * 1024
+
+
+class ManifestError(ValueError):
+    pass
+
+
+class ImageTooLarge(ValueError):
+    """Raised by an image loader whose photo is over MAX_IMAGE_BYTES."""
+
+
+@dataclass
+class EnrollItem:
+    row: int  # 1-based data row in the manifest
+    name: str
+    tipe_class: str
+    branch_id: Optional[int]
+    image: str
+    load: Optional[Callable[[], bytes]] = None  # None if the image is missing; may raise ImageTooLarge
+
+
+@dataclass
+class EnrollResult:
+    row: int
+    name: str
+    image: str
+    status: str = "error"
+    student_id: Optional[int] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class EnrollReport:
+    results: List[EnrollResult] = field(default_factory=list)
+    cache_refreshed: bool = False
+
+    def as_dict(self) -> dict:
+        enrolled = sum(1 for r in self.results if r.status == "ok")
+        return {
+            "total": len(self.results),
+            "enrolled": enrolled,
+            "failed": len(self.results) - enrolled,
+            "cache_refreshed": self.cache_refreshed,
+            "results": [r.__dict__ for r in self.results],
+        }
+
+
+def parse_manifest(text: str, default_branch_id: Optional[int] = None) -> List[EnrollItem]:
+    reader = csv.DictReader(io.StringIO(text))
+    missing = {"name", "image"} - set(reader.fieldnames or ())
+    if missing:
+        raise ManifestError(f"manifest is missing columns: {', '.join(sorted(missing))}")
+
+    items = []
+    for i, rec in enumerate(reader, start=1):
+        if i > ENROLL_MAX_ROWS:
+            raise ManifestError(f"manifest has more than {ENROLL_MAX_ROWS} rows")
+        raw_branch = (rec.get("branch_id") or "").strip()
+        try:
+            branch_id = int(raw_branch) if raw_branch else default_branch_id
+        except ValueError:
+            branch_id = None
+        items.append(EnrollItem(
+            row=i,
+            name=(rec.get("name") or "").strip(),
+            tipe_class=(rec.get("tipe_class") or "").strip(),
+            branch_id=branch_id,
+            image=(rec.get("image") or "").strip(),
+        ))
+    return items
+
+
+def _existing_branches(branch_ids) -> set:
+    db = SessionLocal()
+    try:
+        return set(db.execute(select(Branch.id).where(Branch.id.in_(branch_ids))).scalars())
+    finally:
+        db.close()
+
+
+def _insert_students(rows: List[dict]) -> List[int]:
+    """INSERT one batch (executemany with RETURNING) and commit; ids in input order."""
+    db = SessionLocal()
+    try:
+        ids = db.execute(insert(Student).returning(Student.id, sort_by_parameter_order=True), rows).scalars().all()
+        db.commit()
+        return ids
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def enroll(items: List[EnrollItem], pool: InferencePool, concurrency: Optional[int] = None) -> EnrollReport:
+    """Encode, insert and cache a batch of students; never raises per row."""
+    results = {it.row: EnrollResult(row=it.row, name=it.name, image=it.image) for it in items}
+    report = EnrollReport(results=[results[it.row] for it in items])
+
+    branches = await run_in_db(_existing_branches, {it.branch_id for it in items if it.branch_id is not None})
+    todo = []
+    for it in items:
+        res = results[it.row]
+        if not it.name:
+            res.error = "Missing name"
+        elif it.branch_id not in branches:
+            res.error = "Branch not found"
+        elif it.load is None:
+            res.error = "Image not found"
+        else:
+            todo.append(it)
+
+    # leave room in the pool for live kiosk frames
+    limit = asyncio.Semaphore(concurrency or max(1, pool.workers))
+
+    async def encode(it: EnrollItem):
+        async with limit:
+            try:
+                img = await asyncio.to_thread(it.load)
+                return await pool.run(encode_single_face, img, timeout=ENROLL_TIMEOUT)
+            except ImageTooLarge:
+                results[it.row].error = "Image too large"
+            except InferenceError as e:
+                results[it.row].error = f"Encoder error: {e}"
+            except Exception as e:
+                results[it.row].error = f"Unreadable image: {e}"
+            return None
+
+    encodings = await asyncio.gather(*(encode(it) for it in todo))
+
+    ready = []
+    for it, enc in zip(todo, encodings):
+        if enc is not None:
+            ready.append((it, enc))
+        elif results[it.row].error is None:
+            results[it.row].error = "Face not detected"
+
+    for start in range(0, len(ready), ENROLL_BATCH_SIZE):
+        batch = ready[start:start + ENROLL_BATCH_SIZE]
+        rows = [
+            {"name": it.name, "tipe_class": it.tipe_class, "branch_id": it.branch_id, "face_embedding": enc}
+            for it, enc in batch
+        ]
+        try:
+            ids = await run_in_db(_insert_students, rows)
+        except Exception as e:
+            for it, _ in batch:
+                results[it.row].error = f"Insert failed: {e}"
+            continue
+        for (it, _), student_id in zip(batch, ids):
+            results[it.row].status = "ok"
+            results[it.row].student_id = student_id
+
+    if any(r.status == "ok" for r in report.results):
+        try:
+            # a reseed already running may have read the DB before our inserts; fresh waits it out
+            report.cache_refreshed = await reseed_students_cache(fresh=True)
+        except Exception as e:
+            # the periodic refresh picks the new students up
+            print("⚠️ Student cache reseed after bulk enrollment failed:", e)
+
+    return report
+
+
+def attach_images(items: List[EnrollItem], loaders: Dict[str, Callable[[], bytes]]) -> None:
+    """Set ``load`` from a {file name: loader} map; names match case-insensitively, without directories."""
+    by_name = {os.path.basename(k).lower(): v for k, v in loaders.items()}
+    for it in items:
+        it.load = by_name.get(os.path.basename(it.image).lower()) if it.image else None
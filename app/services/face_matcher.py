@@ -0,0 +1,127 @@
+# app/services/face_matcher.py
+from dataclasses import dataclass
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+from app.core.config import ANN_MIN_GALLERY
+from app.services.ann_index import IVFIndex
+
+EMBEDDING_DIM = 128
+DEFAULT_TOLERANCE = 0.45
+
+
+@dataclass
+class FaceMatch:
+    index: int
+    distance: float
+    student: Dict[str, Any]
+
+
+@dataclass
+class MatchResult:
+    candidates: List[FaceMatch]  # top-k, nearest first
+    margin: float  # distance gap between best and second-best (inf if only one)
+    is_match: bool
+
+    @property
+    def best(self) -> FaceMatch | None:
+        return self.candidates[0] if self.candidates else None
+
+
+def as_embedding_matrix(encodings) -> np.ndarray:
+    """Return encodings as one C-contiguous (n, 128) float32 matrix."""
+    if encodings is None or len(encodings) == 0:
+        return np.empty((0, EMBEDDING_DIM), dtype=np.float32)
+    return np.ascontiguousarray(np.asarray(encodings, dtype=np.float32).reshape(-1, EMBEDDING_DIM))
+
+
+class FaceMatcher:
+    """Exact euclidean matcher over one contiguous float32 gallery matrix.
+
+    Distances for every detected face in a frame are computed together with a
+    single matrix product (||q||^2 + ||g||^2 - 2 q.g), so the gallery is
+    scanned once per frame instead of twice per face.
+    """
+
+    def __init__(self, encodings, students: Sequence[Dict[str, Any]], tolerance: float = DEFAULT_TOLERANCE,
+                 ann: bool | None = None, previous: "FaceMatcher | None" = None):
+        self.matrix = as_embedding_matrix(encodings)
+        if len(students) != self.matrix.shape[0]:
+            raise ValueError("students and encodings must have the same length")
+        self.students = list(students)
+        self.tolerance = tolerance
+        self.sq_norms = np.einsum("ij,ij->i", self.matrix, self.matrix)
+
+        # large galleries match through an IVF index (None = decide by ANN_MIN_GALLERY)
+        if ann is None:
+            ann = ANN_MIN_GALLERY > 0 and len(self.matrix) >= ANN_MIN_GALLERY
+        self.index = self._build_index(previous) if ann and len(self.matrix) else None
+
+    def _build_index(self, previous: "FaceMatcher | None") -> IVFIndex:
+        prev = previous.index if previous is not None else None
+        if prev is not None and 0.5 <= len(self.matrix) / prev.trained_size <= 2.0:
+            # a delta away from the previous snapshot: keep the trained cells
+            return IVFIndex(self.matrix, centroids=prev.centroids, trained_size=prev.trained_size)
+        return IVFIndex(self.matrix)
+
+    @classmethod
+    def from_students(cls, students: Sequence[Dict[str, Any]], tolerance: float = DEFAULT_TOLERANCE):
+        """Build from cached student dicts, skipping those without an embedding."""
+        known = [s for s in students if s.get("face_embedding") is not None and len(s["face_embedding"])]
+        encodings = [s["face_embedding"] for s in known]
+        return cls(encodings, known, tolerance)
+
+    def __len__(self):
+        return self.matrix.shape[0]
+
+    def distances(self, face_encodings) -> np.ndarray:
+        """Return the (faces, gallery) euclidean distance matrix."""
+        queries = as_embedding_matrix(face_encodings)
+        q_norms = np.einsum("ij,ij->i", queries, queries)
+        sq = q_norms[:, None] + self.sq_norms[None, :] - 2.0 * (queries @ self.matrix.T)
+        np.maximum(sq, 0.0, out=sq)
+        return np.sqrt(sq, out=sq)
+
+    def _exact_top(self, face_encodings, ranked: int):
+        dists = self.distances(face_encodings)
+        if ranked < dists.shape[1]:
+            top = np.argpartition(dists, ranked - 1, axis=1)[:, :ranked]
+        else:
+            top = np.broadcast_to(np.arange(ranked), (dists.shape[0], ranked))
+        top_d = np.take_along_axis(dists, top, axis=1)
+        order = np.argsort(top_d, axis=1)
+        return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_d, order, axis=1)
+
+    def match(self, face_encodings, k: int = 1) -> List[MatchResult]:
+        """Match every face of a frame against the gallery in one pass.
+
+        Returns one MatchResult per face with up to ``k`` nearest candidates
+        (at least two are ranked so the margin is always available).
+        """
+        n_faces = len(face_encodings)
+        if n_faces == 0:
+            return []
+        if len(self) == 0:
+            return [MatchResult(candidates=[], margin=float("inf"), is_match=False) for _ in range(n_faces)]
+
+        ranked = min(max(k, 2), len(self))
+        if self.index is not None:
+            top, top_d = self.index.search(as_embedding_matrix(face_encodings), ranked)
+        else:
+            top, top_d = self._exact_top(face_encodings, ranked)
+
+        results = []
+        for row, row_d in zip(top, top_d):
+            candidates = [
+                FaceMatch(index=int(i), distance=float(d), student=self.students[int(i)])
+                for i, d in zip(row[:k], row_d[:k])
+                if i >= 0
+            ]
+            margin = float(row_d[1] - row_d[0]) if len(row_d) > 1 and np.isfinite(row_d[1]) else float("inf")
+            results.append(MatchResult(
+                candidates=candidates,
+                margin=margin,
+                is_match=bool(row_d[0] <= self.tolerance),
+            ))
+        return results
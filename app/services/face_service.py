@@ -1,13 +1,18 @@
-import face_recognition
-import numpy as np
+from app.services.face_matcher import FaceMatcher, DEFAULT_TOLERANCE
 
 def get_face_encoding(image):
+    import face_recognition  # loads dlib models; keep it off the import path
+
     encodings = face_recognition.face_encodings(image)
     if len(encodings) > 0:
         return encodings[0].tolist()
     return None
 
-def compare_faces(known_encodings, face_encoding, tolerance=0.45):
-    results = face_recognition.compare_faces(known_encodings, face_encoding, tolerance)
-    distances = face_recognition.face_distance(known_encodings, face_encoding)
-    return results, distances
\ No newline at end of file
+def compare_faces(known_encodings, face_encoding, tolerance=DEFAULT_TOLERANCE):
+    # single distance pass; results are derived from the same vector (a one-off matcher never trains an index)
+    matcher = known_encodings if isinstance(known_encodings, FaceMatcher) else FaceMatcher(
+        known_encodings, [None] * len(known_encodings), tolerance, ann=False
+    )
+    distances = matcher.distances([face_encoding])[0]
+    results = list(distances <= tolerance)
+    return results, distances
@@ -0,0 +1,147 @@
+# app/services/face_tracker.py
+from dataclasses import dataclass, field
+from itertools import count
+from typing import Any, Dict, List, Sequence, Tuple
+
+from app.core.config import TRACK_MIN_IOU, TRACK_DECAY, TRACK_MIN_CONFIDENCE, TRACK_MAX_MISSES
+
+# face_recognition box order: (top, right, bottom, left)
+Box = Tuple[int, int, int, int]
+
+
+def iou(a: Box, b: Box) -> float:
+    top, right = max(a[0], b[0]), min(a[1], b[1])
+    bottom, left = min(a[2], b[2]), max(a[3], b[3])
+    inter = max(0, right - left) * max(0, bottom - top)
+    if inter == 0:
+        return 0.0
+    area_a = (a[1] - a[3]) * (a[2] - a[0])
+    area_b = (b[1] - b[3]) * (b[2] - b[0])
+    return inter / float(area_a + area_b - inter)
+
+
+def centroid_distance(a: Box, b: Box) -> float:
+    """Centroid distance relative to the larger box size (0 = same centre)."""
+    ay, ax = (a[0] + a[2]) / 2, (a[1] + a[3]) / 2
+    by, bx = (b[0] + b[2]) / 2, (b[1] + b[3]) / 2
+    size = max(a[2] - a[0], a[1] - a[3], b[2] - b[0], b[1] - b[3], 1)
+    return ((ay - by) ** 2 + (ax - bx) ** 2) ** 0.5 / size
+
+
+def associate(boxes: Sequence[Box], tracks: Sequence[Tuple[int, Box]], min_iou: float = TRACK_MIN_IOU,
+              max_centroid: float = 0.5) -> List[int | None]:
+    """Greedily assign each box to at most one track id.
+
+    Pairs are ranked by IoU; boxes that moved too far for any overlap fall
+    back to a centroid distance check. Returns one track id (or None) per box.
+    """
+    pairs = []
+    for bi, box in enumerate(boxes):
+        for track_id, track_box in tracks:
+            overlap = iou(box, track_box)
+            if overlap >= min_iou:
+                pairs.append((1.0 + overlap, bi, track_id))
+                continue
+            dist = centroid_distance(box, track_box)
+            if dist <= max_centroid:
+                pairs.append((1.0 - dist, bi, track_id))
+
+    assigned: List[int | None] = [None] * len(boxes)
+    used = set()
+    for _, bi, track_id in sorted(pairs, reverse=True):
+        if assigned[bi] is None and track_id not in used:
+            assigned[bi] = track_id
+            used.add(track_id)
+    return assigned
+
+
+@dataclass
+class Track:
+    id: int
+    box: Box
+    student: Dict[str, Any] | None = None
+    distance: float | None = None
+    confidence: float = 0.0
+    misses: int = 0
+    logged: set = field(default_factory=set)  # actions already written for this person
+
+    @property
+    def confirmed(self) -> bool:
+        return self.student is not None
+
+
+class FaceTracker:
+    """Per-session tracker that lets confirmed faces skip the 128-d encoder."""
+
+    def __init__(self, min_iou: float = TRACK_MIN_IOU, decay: float = TRACK_DECAY,
+                 min_confidence: float = TRACK_MIN_CONFIDENCE, max_misses: int = TRACK_MAX_MISSES):
+        self.min_iou = min_iou
+        self.decay = decay
+        self.min_confidence = min_confidence
+        self.max_misses = max_misses
+        self.tracks: Dict[int, Track] = {}
+        self._ids = count(1)
+        self.encoded = 0
+        self.reused = 0
+
+    def reusable(self) -> List[Tuple[int, Box]]:
+        """Tracks whose identity is still trusted; matching boxes need no encoding."""
+        return [
+            (t.id, t.box) for t in self.tracks.values()
+            if t.confirmed and t.confidence * self.decay >= self.min_confidence
+        ]
+
+    def update(self, boxes: Sequence[Box], reused_ids: Sequence[int | None], matches) -> List[Track]:
+        """Apply one frame's detections and return a Track per box, in order.
+
+        ``reused_ids`` is the association done against :meth:`reusable`;
+        ``matches`` holds one MatchResult per box that was encoded (the
+        boxes whose reused id is None), in the same order.
+        """
+        result: List[Track | None] = [None] * len(boxes)
+        seen = set()
+
+        for i, track_id in enumerate(reused_ids):
+            track = self.tracks.get(track_id) if track_id is not None else None
+            if track is None:
+                continue
+            track.box = tuple(boxes[i])
+            track.confidence *= self.decay
+            track.misses = 0
+            result[i] = track
+            seen.add(track.id)
+            self.reused += 1
+
+        # re-encoded boxes may still belong to an existing (decayed or unknown) track
+        pending = [i for i, t in enumerate(result) if t is None]
+        candidates = [(t.id, t.box) for t in self.tracks.values() if t.id not in seen]
+        previous = associate([boxes[i] for i in pending], candidates, self.min_iou)
+
+        for i, prev_id, match in zip(pending, previous, matches):
+            track = self.tracks.get(prev_id) if prev_id is not None else None
+            if track is None:
+                track = Track(id=next(self._ids), box=tuple(boxes[i]))
+                self.tracks[track.id] = track
+            track.box = tuple(boxes[i])
+            track.misses = 0
+            self.encoded += 1
+
+            student = match.best.student if match.is_match else None
+            if student is None or track.student is None or student.get("id") != track.student.get("id"):
+                track.logged = set()
+            track.student = student
+            track.distance = match.best.distance if match.best else None
+            track.confidence = 1.0 if student is not None else 0.0
+            result[i] = track
+            seen.add(track.id)
+
+        for track in list(self.tracks.values()):
+            if track.id not in seen:
+                track.misses += 1
+                if track.misses > self.max_misses:
+                    del self.tracks[track.id]
+
+        return result
+
+    def stats(self) -> dict:
+        return {"encoded": self.encoded, "reused": self.reused, "tracks": len(self.tracks)}
@@ -0,0 +1,220 @@
+# app/services/gallery.py
+import asyncio
+from typing import Any, Dict, List, Set
+
+import numpy as np
+
+from app.services.face_matcher import FaceMatcher
+from app.services.shared_gallery import SharedMatrixStore
+from app.utils.cache_utils import (
+    GALLERY_CHANNEL,
+    load_branch_gallery,
+    parse_gallery_event,
+    remove_row,
+    upsert_row,
+)
+from app.utils.events import subscribe
+
+ALL_BRANCHES = None  # registry key for the ADMIN gallery spanning every branch
+
+
+class Gallery:
+    """Read-only snapshot of a branch gallery. Updates build a new Gallery.
+
+    ``matrix`` is normally a read-only mapping of a host-wide file (``path``),
+    shared with the other workers; sessions hold a reference, never a copy.
+    A float32 ANN index keeps its cell-ordered rows in a second file
+    (``ivf_path``).
+    """
+
+    def __init__(self, students: List[Dict[str, Any]], matrix: np.ndarray, versions: Dict[int, int],
+                 previous: "Gallery | None" = None, path: str | None = None):
+        self.students = students
+        self.matrix = matrix
+        self.path = path
+        self.ivf_path: str | None = None
+        self.versions = dict(versions)  # {branch_id: cache version} this snapshot includes
+        # large galleries get an ANN index; a delta reuses the previous snapshot's trained cells
+        self.matcher = FaceMatcher(matrix, students, previous=previous.matcher if previous else None)
+
+    def __len__(self):
+        return len(self.students)
+
+    @property
+    def paths(self) -> set:
+        return {p for p in (self.path, self.ivf_path) if p}
+
+
+class GalleryRegistry:
+    """Per-worker galleries, loaded once from the redis cache and then kept
+    current by applying add/replace/remove deltas from gallery events.
+
+    Sessions call :meth:`get` for every frame; it is a dict lookup unless
+    the gallery has to be (re)loaded after a reseed or a missed event. New
+    snapshots are built off the event loop and replace old ones with a
+    single dict assignment, so a session keeps matching against the
+    snapshot it already holds.
+
+    Loads and deltas of one key run one at a time, in event order, under
+    that key's lock; an event that arrives while the key is loading waits
+    for the load and is then applied to (or skipped by) its result.
+    """
+
+    def __init__(self, store: SharedMatrixStore | None = None):
+        self.store = store or SharedMatrixStore()
+        self._galleries: Dict[int | None, Gallery] = {}
+        self._loading: Dict[int | None, asyncio.Future] = {}
+        self._locks: Dict[int | None, asyncio.Lock] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._retired: Dict[int | None, Set[str]] = {}  # files of galleries dropped by reset()
+        self._latest: Dict[int, int] = {}  # newest version announced per branch
+        self._generation = 0  # bumped by reset(); work started before a reset is thrown away
+        self.loads = 0
+        self.deltas = 0
+
+    async def get(self, branch_id: int | None) -> Gallery:
+        gallery = self._galleries.get(branch_id)
+        if gallery is not None:
+            return gallery
+        fut = self._loading.get(branch_id)
+        if fut is None:
+            fut = asyncio.ensure_future(self._load(branch_id))
+            self._loading[branch_id] = fut
+            fut.add_done_callback(lambda _: self._loading.pop(branch_id, None))
+        return await asyncio.shield(fut)
+
+    def _lock(self, key: int | None) -> asyncio.Lock:
+        return self._locks.setdefault(key, asyncio.Lock())
+
+    async def _load(self, branch_id: int | None) -> Gallery:
+        async with self._lock(branch_id):
+            while True:
+                generation = self._generation
+                for _ in range(3):
+                    students, matrix, versions = await load_branch_gallery(branch_id)
+                    # an event may have been published while we were reading; read again if so
+                    if all(self._latest.get(bid, 0) <= v for bid, v in versions.items()):
+                        break
+                # hashing/publishing the matrix and index training can take a while; keep them off the loop
+                gallery = await asyncio.to_thread(self._build, branch_id, students, matrix, versions)
+                if generation == self._generation:
+                    break
+                # reseeded while building: this snapshot may predate it
+                self._discard(branch_id, gallery)
+            self._swap(branch_id, gallery)
+            self.loads += 1
+            return gallery
+
+    def _build(self, key: int | None, students, matrix, versions, previous: Gallery | None = None) -> Gallery:
+        matrix, path = self.store.share(key, matrix)
+        gallery = Gallery(students, matrix, versions, previous=previous, path=path)
+        index = gallery.matcher.index
+        if index is not None and index.vectors is not None:
+            # replace the index's private cell-ordered copy with a host-wide mapping
+            index.vectors, gallery.ivf_path = self.store.share(key, index.vectors, tag="-ivf")
+        return gallery
+
+    def _release(self, gallery: Gallery, keep: Gallery | None):
+        for path in gallery.paths - (keep.paths if keep is not None else set()):
+            self.store.release(path)
+
+    def _swap(self, key: int | None, gallery: Gallery | None):
+        old = self._galleries.pop(key, None)
+        if gallery is not None:
+            self._galleries[key] = gallery
+            # files retired by reset() that the reload did not map again
+            for path in self._retired.pop(key, set()) - gallery.paths:
+                self.store.release(path)
+        if old is not None:
+            self._release(old, keep=gallery)
+
+    def _discard(self, key: int | None, gallery: Gallery):
+        """Drop a snapshot that was built but never swapped in."""
+        self._release(gallery, keep=self._galleries.get(key))
+
+    def reset(self):
+        """Forget every gallery; sessions keep their snapshot until the next get() reloads."""
+        self._generation += 1
+        for key, gallery in list(self._galleries.items()):
+            # keep the files: the reload usually maps the same content again, and other
+            # workers may have them mapped; the next swap of this key releases what it did not reuse
+            del self._galleries[key]
+            self._retired[key] = self._retired.get(key, set()) | gallery.paths
+        self._latest.clear()
+
+    def apply(self, event: dict):
+        """Record an event and schedule it for the galleries it touches (runs on the loop, never blocks)."""
+        bid, version = event["branch_id"], event["version"]
+        self._latest[bid] = max(self._latest.get(bid, 0), version)
+
+        for key in (bid, ALL_BRANCHES):
+            if key in self._galleries or key in self._loading:
+                task = asyncio.ensure_future(self._apply(key, event, self._generation))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+    async def _apply(self, key: int | None, event: dict, generation: int):
+        bid, version = event["branch_id"], event["version"]
+        async with self._lock(key):
+            gallery = self._galleries.get(key)
+            if gallery is None or generation != self._generation:
+                return
+            current = gallery.versions.get(bid, 0)
+            if version <= current:
+                return
+            if event["op"] == "reload" or version != current + 1:
+                # reseeded with new content, or missed an event for this branch; reload on next use
+                self._swap(key, None)
+                return
+
+            try:
+                new = await asyncio.to_thread(self._delta, key, gallery, event)
+            except Exception as e:
+                print(f"⚠️ Gallery delta for {key} failed, reloading on next use:", e)
+                self._swap(key, None)
+                return
+            if generation != self._generation:
+                self._discard(key, new)
+                return
+            self._swap(key, new)
+            self.deltas += 1
+
+    def _delta(self, key: int | None, gallery: Gallery, event: dict) -> Gallery:
+        students, matrix = gallery.students, gallery.matrix
+        if event["op"] == "upsert":
+            students, matrix = upsert_row(students, matrix, event["student"], event["embedding"])
+        elif event["op"] == "remove":
+            removed = remove_row(students, matrix, event["student_id"])
+            if removed is not None:
+                students, matrix = removed
+        versions = {**gallery.versions, event["branch_id"]: event["version"]}
+        return self._build(key, students, matrix, versions, previous=gallery)
+
+    def on_message(self, data: bytes):
+        self.apply(parse_gallery_event(data))
+
+    async def drain(self):
+        """Wait until every scheduled delta has been applied."""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "galleries": {str(k): len(g) for k, g in self._galleries.items()},
+            "ann": {str(k): g.matcher.index.stats() for k, g in self._galleries.items() if g.matcher.index is not None},
+            "loads": self.loads,
+            "deltas": self.deltas,
+            "shared": {str(k): sorted(g.paths) for k, g in self._galleries.items()},
+            "store": self.store.stats(),
+        }
+
+
+_registry: GalleryRegistry | None = None
+
+
+def get_gallery_registry() -> GalleryRegistry:
+    global _registry
+    if _registry is None:
+        _registry = GalleryRegistry()
+        subscribe(GALLERY_CHANNEL, _registry.on_message, _registry.reset)
+    return _registry
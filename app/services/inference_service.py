@@ -0,0 +1,207 @@
+# app/services/inference_service.py
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import cv2
+import numpy as np
+
+from app.core.config import INFERENCE_WORKERS, INFERENCE_MAX_PENDING, INFERENCE_TIMEOUT, FRAME_SCALE, TRACK_MIN_IOU
+from app.services.face_tracker import associate
+
+
+class InferenceError(Exception):
+    pass
+
+
+class InferenceTimeout(InferenceError):
+    pass
+
+
+# ---------------------------------------------------------------------------
+# Jobs (run inside the pool; must stay module-level so they can be pickled)
+# ---------------------------------------------------------------------------
+_face_recognition = None
+
+
+def _init_worker():
+    """Load dlib models once per child and run one dummy inference."""
+    global _face_recognition
+    import face_recognition
+
+    _face_recognition = face_recognition
+    face_recognition.face_encodings(np.zeros((64, 64, 3), dtype=np.uint8))
+
+
+def _fr():
+    if _face_recognition is None:
+        _init_worker()
+    return _face_recognition
+
+
+def _warm_up_job():
+    _fr()
+    return os.getpid()
+
+
+def decode_image(buf, offset: int = 0):
+    """Decode JPEG/PNG bytes (optionally starting at offset) into a BGR image."""
+    np_arr = np.frombuffer(buf, np.uint8, offset=offset)
+    return cv2.imdecode(np_arr, cv2.IMREAD_COLOR)
+
+
+def detect_and_encode(buf, offset: int = 0, scale: float = FRAME_SCALE, reuse=(), min_iou: float = TRACK_MIN_IOU):
+    """Decode a kiosk frame, detect faces and encode the ones that need it.
+
+    Boxes that associate with one of the ``reuse`` tracks ((track_id, box)
+    pairs) skip the 128-d encoder. Returns ``(boxes, reused_ids, encodings)``
+    where ``encodings`` is a float32 matrix with one row per box whose
+    reused id is None.
+    """
+    frame = decode_image(buf, offset)
+    if frame is None:
+        return [], [], np.empty((0, 128), dtype=np.float32)
+    if scale != 1.0:
+        frame = cv2.resize(frame, (0, 0), fx=scale, fy=scale)
+    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+    fr = _fr()
+    boxes = [tuple(int(v) for v in b) for b in fr.face_locations(rgb)]
+    reused_ids = associate(boxes, reuse, min_iou) if reuse else [None] * len(boxes)
+    to_encode = [b for b, tid in zip(boxes, reused_ids) if tid is None]
+    encodings = fr.face_encodings(rgb, known_face_locations=to_encode) if to_encode else []
+    return boxes, reused_ids, np.asarray(encodings, dtype=np.float32).reshape(-1, 128)
+
+
+def encode_single_face(buf):
+    """Return the first face encoding of an uploaded photo (float32), or None."""
+    img = decode_image(buf)
+    if img is None:
+        return None
+    rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    encodings = _fr().face_encodings(rgb)
+    if len(encodings) > 0:
+        return np.asarray(encodings[0], dtype=np.float32)
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Executor
+# ---------------------------------------------------------------------------
+class InferencePool:
+    """Bounded executor for dlib inference.
+
+    At most ``max_pending`` jobs are queued or running per uvicorn worker;
+    callers wait for a slot and the whole job is bounded by ``timeout``.
+    """
+
+    def __init__(self, workers: int = INFERENCE_WORKERS, max_pending: int = INFERENCE_MAX_PENDING,
+                 timeout: float = INFERENCE_TIMEOUT):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._executor = None
+        self._slots = None
+        self._in_flight = 0  # jobs holding a slot, until the job itself finishes
+
+    def start(self):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+        if self._executor is not None:
+            return
+        if self.workers > 0:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="inference", initializer=_init_worker)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _restart(self, broken):
+        """Replace ``broken`` unless a concurrent failure already replaced it."""
+        if self._executor is broken:
+            self.shutdown()
+            self.start()
+
+    async def warm_up(self, timeout: float = 120.0) -> int:
+        """Start every worker now (models load plus one dummy inference each).
+
+        Returns how many distinct workers answered.
+        """
+        self.start()
+        loop = asyncio.get_running_loop()
+        executor = self._executor
+        jobs = [loop.run_in_executor(executor, _warm_up_job) for _ in range(max(1, self.workers))]
+        try:
+            pids = await asyncio.wait_for(asyncio.gather(*jobs), timeout)
+        except BrokenProcessPool as e:
+            self._restart(executor)  # the next attempt gets fresh workers
+            raise InferenceError("inference worker crashed while loading models") from e
+        return len(set(pids))
+
+    @property
+    def pending(self) -> int:
+        return self._in_flight
+
+    async def run(self, fn, *args, timeout: float | None = None):
+        self.start()
+        timeout = self.timeout if timeout is None else timeout
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+
+        slots = self._slots
+        try:
+            await asyncio.wait_for(slots.acquire(), timeout)
+        except asyncio.TimeoutError:
+            raise InferenceTimeout("inference queue is full")
+        self._in_flight += 1
+
+        def done(fut):
+            # the slot is held until the job really ends, not when the caller gives up on it
+            self._in_flight -= 1
+            slots.release()
+            if not fut.cancelled():
+                fut.exception()  # retrieved here when the caller timed out
+
+        executor = self._executor
+        try:
+            fut = loop.run_in_executor(executor, fn, *args)
+        except BaseException:
+            self._in_flight -= 1
+            slots.release()
+            raise
+        fut.add_done_callback(done)
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(fut), max(0.0, deadline - loop.time()))
+        except asyncio.TimeoutError:
+            raise InferenceTimeout(f"inference job exceeded {timeout}s")
+        except asyncio.CancelledError:
+            if fut.cancelled():
+                # dropped by a pool restart; the caller itself was not cancelled
+                raise InferenceError("inference job cancelled by a pool restart") from None
+            raise
+        except BrokenProcessPool as e:
+            # a child died (OOM, segfault in dlib); replace the pool for the next job
+            if self._executor is executor:
+                print("⚠️ Inference pool broken, restarting:", e)
+            self._restart(executor)
+            raise InferenceError("inference worker crashed") from e
+
+
+_pool: InferencePool | None = None
+
+
+def get_inference_pool() -> InferencePool:
+    global _pool
+    if _pool is None:
+        _pool = InferencePool()
+    return _pool
@@ -0,0 +1,60 @@
+# app/services/latest_frame.py
+import asyncio
+import time
+
+
+class LatestFrameSlot:
+    """Single-slot mailbox between a session's reader and inference tasks.
+
+    The reader overwrites whatever is pending (latest frame wins), so the
+    inference task never works through a backlog. A frame that waited longer
+    than ``max_age`` seconds is discarded as stale.
+    """
+
+    def __init__(self, max_age: float):
+        self.max_age = max_age
+        self._item = None
+        self._event = asyncio.Event()
+        self._closed = False
+
+        self.received = 0
+        self.invalid = 0
+        self.dropped = 0
+        self.stale = 0
+        self.processed = 0
+
+    def put(self, frame):
+        self.received += 1
+        if self._item is not None:
+            self.dropped += 1
+        self._item = (frame, time.monotonic())
+        self._event.set()
+
+    def close(self):
+        self._closed = True
+        self._event.set()
+
+    async def get(self):
+        """Return the newest fresh frame, or None once the reader has closed."""
+        while True:
+            if self._item is None:
+                if self._closed:
+                    return None
+                self._event.clear()
+                await self._event.wait()
+                continue
+            (frame, received_at), self._item = self._item, None
+            if time.monotonic() - received_at > self.max_age:
+                self.stale += 1
+                continue
+            self.processed += 1
+            return frame
+
+    def stats(self) -> dict:
+        return {
+            "received": self.received,
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "stale": self.stale,
+            "invalid": self.invalid,
+        }
@@ -0,0 +1,159 @@
+# app/services/log_summary_service.py
+from collections import defaultdict
+from datetime import date
+from typing import Iterable, Optional, Tuple
+
+from sqlalchemy import Integer, Date, String, column, func, select, text, values
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models import Branch, LogBook, LogDailySummary, Student
+
+# (action, student_id, tipe, log_date, other_done) as returned by upsert_daily_logs
+Transition = Tuple[str, int, str, date, bool]
+
+
+def transition_deltas(transitions: Iterable[Transition]):
+    """Fold status transitions into per-(student, tipe, day) count deltas."""
+    deltas = defaultdict(lambda: [0, 0, 0])  # taken, returned, outstanding
+    for action, student_id, tipe, log_date, other_done in transitions:
+        d = deltas[(student_id, tipe, log_date)]
+        if action == "mengambil":
+            d[0] += 1
+            if not other_done:
+                d[2] += 1
+        else:
+            d[1] += 1
+            if other_done:
+                d[2] -= 1
+    return deltas
+
+
+def apply_log_transitions(db: Session, transitions: Iterable[Transition]) -> None:
+    """Add the effect of LogBook transitions to the daily summary, in one statement.
+
+    Call in the same transaction as the LogBook upsert so both commit together.
+    """
+    deltas = transition_deltas(transitions)
+    if not deltas:
+        return
+
+    d = values(
+        column("student_id", Integer),
+        column("tipe", String),
+        column("log_date", Date),
+        column("taken", Integer),
+        column("returned", Integer),
+        column("outstanding", Integer),
+        name="d",
+    ).data([(sid, tipe, day, *counts) for (sid, tipe, day), counts in deltas.items()])
+
+    rows = (
+        select(
+            Student.branch_id,
+            d.c.tipe.cast(LogDailySummary.tipe.type),
+            d.c.log_date,
+            func.sum(d.c.taken),
+            func.sum(d.c.returned),
+            func.sum(d.c.outstanding),
+            func.now(),
+        )
+        .join(Student, Student.id == d.c.student_id)
+        .where(Student.branch_id.isnot(None))
+        .group_by(Student.branch_id, d.c.tipe, d.c.log_date)
+    )
+    stmt = pg_insert(LogDailySummary).from_select(
+        ["branch_id", "tipe", "log_date", "taken", "returned", "outstanding", "updated_at"], rows
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[LogDailySummary.branch_id, LogDailySummary.tipe, LogDailySummary.log_date],
+        set_={
+            "taken": LogDailySummary.taken + stmt.excluded.taken,
+            "returned": LogDailySummary.returned + stmt.excluded.returned,
+            "outstanding": LogDailySummary.outstanding + stmt.excluded.outstanding,
+            "updated_at": stmt.excluded.updated_at,
+        },
+    )
+    db.execute(stmt)
+
+
+def rebuild_summaries(db: Session, date_from: Optional[date] = None, date_to: Optional[date] = None) -> int:
+    """Recompute the summary rows of a date range from log_books.
+
+    The table lock makes concurrent writers wait until this transaction
+    commits, so their deltas land on top of the rebuilt rows instead of
+    being counted twice or lost. The caller commits.
+    """
+    db.execute(text("LOCK TABLE log_daily_summaries IN EXCLUSIVE MODE"))
+
+    delete = LogDailySummary.__table__.delete()
+    if date_from:
+        delete = delete.where(LogDailySummary.log_date >= date_from)
+    if date_to:
+        delete = delete.where(LogDailySummary.log_date <= date_to)
+    db.execute(delete)
+
+    took = LogBook.mengambil == "SUDAH"
+    returned = LogBook.mengembalikan == "SUDAH"
+    rows = (
+        select(
+            Student.branch_id,
+            LogBook.tipe,
+            LogBook.log_date,
+            func.count().filter(took),
+            func.count().filter(returned),
+            func.count().filter(took & ~returned),
+            func.now(),
+        )
+        .join(Student, Student.id == LogBook.student_id)
+        .where(Student.branch_id.isnot(None))
+        .group_by(Student.branch_id, LogBook.tipe, LogBook.log_date)
+    )
+    if date_from:
+        rows = rows.where(LogBook.log_date >= date_from)
+    if date_to:
+        rows = rows.where(LogBook.log_date <= date_to)
+
+    result = db.execute(LogDailySummary.__table__.insert().from_select(
+        ["branch_id", "tipe", "log_date", "taken", "returned", "outstanding", "updated_at"], rows
+    ))
+    return result.rowcount
+
+
+def get_summary(
+    db: Session,
+    date_from: date,
+    date_to: date,
+    tipe: Optional[str] = None,
+    branch_id: Optional[int] = None,
+):
+    query = (
+        db.query(
+            LogDailySummary.branch_id,
+            Branch.name.label("branch_name"),
+            LogDailySummary.tipe,
+            LogDailySummary.log_date,
+            LogDailySummary.taken,
+            LogDailySummary.returned,
+            LogDailySummary.outstanding,
+        )
+        .join(Branch, Branch.id == LogDailySummary.branch_id)
+        .filter(LogDailySummary.log_date >= date_from, LogDailySummary.log_date <= date_to)
+    )
+    if tipe:
+        query = query.filter(LogDailySummary.tipe == tipe)
+    if branch_id:
+        query = query.filter(LogDailySummary.branch_id == branch_id)
+
+    return [
+        {
+            "branch_id": r.branch_id,
+            "branch_name": r.branch_name,
+            "tipe": r.tipe,
+            "log_date": r.log_date.isoformat(),
+            "taken": r.taken,
+            "returned": r.returned,
+            "outstanding": r.outstanding,
+        }
+        for r in query.order_by(LogDailySummary.log_date.desc(), LogDailySummary.branch_id, LogDailySummary.tipe)
+    ]
@@ -0,0 +1,190 @@
+# app/services/log_writer.py
+import asyncio
+from datetime import date
+from typing import Dict, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.exc import DataError, IntegrityError
+
+from app.core.config import LOG_FLUSH_INTERVAL, LOG_FLUSH_MAX_ATTEMPTS
+from app.database import SessionLocal, run_in_db
+from app.models import Student
+from app.services.logbook_service import upsert_daily_logs
+from app.services.log_summary_service import apply_log_transitions
+
+ACTIONS = ("mengambil", "mengembalikan")
+
+PendingKey = Tuple[int, str, date]  # (student_id, tipe, log_date)
+
+
+class LogBookWriter:
+    """Write-behind LogBook writer with an in-memory "already logged today" state.
+
+    ``record`` is synchronous and never touches the database: repeated
+    recognitions of a student that is already SUDAH for the day are no-ops,
+    real changes are queued and written by a background task in one
+    transaction per interval. ``stop`` flushes whatever is still queued.
+
+    Entries the database rejects (e.g. the student was deleted meanwhile)
+    are dropped on their own; a failed flush is retried, but an entry is
+    given up after ``max_attempts`` so it cannot hold the queue forever.
+    """
+
+    def __init__(self, interval: float = LOG_FLUSH_INTERVAL, max_attempts: int = LOG_FLUSH_MAX_ATTEMPTS):
+        self.interval = interval
+        self.max_attempts = max_attempts
+        self._day = date.today()
+        self._state: Dict[Tuple[int, str], Set[str]] = {}
+        self._pending: Dict[PendingKey, Set[str]] = {}
+        self._attempts: Dict[PendingKey, int] = {}
+        self._task: asyncio.Task | None = None
+        self._flush_lock = asyncio.Lock()
+
+        self.recorded = 0
+        self.skipped = 0
+        self.flushed = 0
+        self.dropped = 0
+
+    def record(self, student_id: int, tipe: str, action: str) -> bool:
+        """Mark ``action`` for today; returns True if it was newly queued."""
+        if action not in ACTIONS:
+            raise ValueError(f"unknown action {action}")
+        today = date.today()
+        if today != self._day:
+            self._day = today
+            self._state.clear()
+
+        done = self._state.setdefault((student_id, tipe), set())
+        if action in done:
+            self.skipped += 1
+            return False
+        done.add(action)
+        self._pending.setdefault((student_id, tipe, today), set()).add(action)
+        self.recorded += 1
+        return True
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        if self._pending:
+            print("⚠️ LogBook writer stopped with unflushed entries:", len(self._pending))
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print("⚠️ LogBook flush error:", e)
+
+    async def flush(self) -> int:
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, {}
+            try:
+                rejected = await run_in_db(_write_batch, batch)
+            except Exception:
+                self._requeue(batch)
+                raise
+            for key in batch:
+                self._attempts.pop(key, None)
+            for key in rejected:
+                print(f"⚠️ LogBook entry {key} rejected by the database, dropped")
+                self._drop(key, batch[key])
+            written = len(batch) - len(rejected)
+            self.flushed += written
+            return written
+
+    def _requeue(self, batch: Dict[PendingKey, Set[str]]):
+        """Put a failed batch back for the next flush, except entries out of attempts."""
+        for key, actions in batch.items():
+            attempts = self._attempts.get(key, 0) + 1
+            if attempts >= self.max_attempts:
+                print(f"⚠️ LogBook entry {key} dropped after {attempts} failed flushes")
+                self._attempts.pop(key, None)
+                self._drop(key, actions)
+                continue
+            self._attempts[key] = attempts
+            self._pending.setdefault(key, set()).update(actions)
+
+    def _drop(self, key: PendingKey, actions: Set[str]):
+        # forget it was logged, so a later recognition today queues it again
+        student_id, tipe, day = key
+        if day == self._day:
+            self._state.get((student_id, tipe), set()).difference_update(actions)
+        self.dropped += 1
+
+    def stats(self) -> dict:
+        return {
+            "recorded": self.recorded,
+            "skipped": self.skipped,
+            "flushed": self.flushed,
+            "dropped": self.dropped,
+            "pending": len(self._pending),
+        }
+
+
+def _write_entries(db, batch: Dict[PendingKey, Set[str]]):
+    entries = [
+        (student_id, tipe, action, day)
+        for (student_id, tipe, day), actions in batch.items()
+        for action in actions
+    ]
+    changed = upsert_daily_logs(db, entries)
+    apply_log_transitions(db, changed)
+
+
+def _write_batch(batch: Dict[PendingKey, Set[str]]) -> Set[PendingKey]:
+    """Write a batch in one transaction; returns the keys that were rejected.
+
+    Entries of students that no longer exist are skipped. The remaining
+    students are locked FOR KEY SHARE, so a concurrent delete waits for this
+    commit. If the batch still violates a constraint, every entry is retried
+    in its own savepoint and only the failing ones are rejected.
+    """
+    db = SessionLocal()
+    try:
+        ids = {student_id for student_id, _, _ in batch}
+        existing = set(db.execute(
+            select(Student.id).where(Student.id.in_(ids)).with_for_update(key_share=True)
+        ).scalars())
+        rejected = {key for key in batch if key[0] not in existing}
+        todo = {key: actions for key, actions in batch.items() if key not in rejected}
+        try:
+            with db.begin_nested():
+                _write_entries(db, todo)
+        except (IntegrityError, DataError):
+            for key, actions in todo.items():
+                try:
+                    with db.begin_nested():
+                        _write_entries(db, {key: actions})
+                except (IntegrityError, DataError):
+                    rejected.add(key)
+        db.commit()
+        return rejected
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+_writer: LogBookWriter | None = None
+
+
+def get_log_writer() -> LogBookWriter:
+    global _writer
+    if _writer is None:
+        _writer = LogBookWriter()
+    return _writer
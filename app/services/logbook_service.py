@@ -0,0 +1,167 @@
+# app/services/logbook_service.py
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models import LogBook, Student
+from app.utils.pagination import PageParams, paginate
+
+ACTION_COLUMNS = ("mengambil", "mengembalikan")
+
+# (student_id, tipe, action, log_date)
+LogEntry = Tuple[int, str, str, date]
+
+
+def upsert_daily_logs(db: Session, entries: Iterable[LogEntry]) -> List[Tuple[str, int, str, date, bool]]:
+    """Mark many students SUDAH for the day with one INSERT ... ON CONFLICT per action.
+
+    Rows are keyed on (student_id, tipe, log_date). The conflict branch only
+    updates rows that are not SUDAH yet, so the returned
+    ``(action, student_id, tipe, log_date, other_done)`` tuples are exactly
+    the state transitions made by this call, even with concurrent writers.
+    ``other_done`` tells whether the row's other action was already SUDAH.
+    The caller owns the transaction.
+    """
+    by_action: dict[str, set] = {}
+    for student_id, tipe, action, log_date in entries:
+        if action not in ACTION_COLUMNS:
+            raise ValueError(f"unknown action {action}")
+        by_action.setdefault(action, set()).add((student_id, tipe, log_date))
+
+    changed = []
+    now = datetime.utcnow()
+    for action, keys in by_action.items():
+        other = "mengembalikan" if action == "mengambil" else "mengambil"
+        column = getattr(LogBook, action)
+        rows = [
+            {
+                "student_id": student_id,
+                "tipe": tipe,
+                "log_date": log_date,
+                "created_at": now,
+                action: "SUDAH",
+                other: "BELUM",
+            }
+            for student_id, tipe, log_date in sorted(keys)
+        ]
+        stmt = pg_insert(LogBook).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[LogBook.student_id, LogBook.tipe, LogBook.log_date],
+            set_={action: "SUDAH"},
+            where=column.is_distinct_from("SUDAH"),
+        ).returning(LogBook.student_id, LogBook.tipe, LogBook.log_date, getattr(LogBook, other))
+        changed.extend(
+            (action, student_id, tipe, log_date, other_status == "SUDAH")
+            for student_id, tipe, log_date, other_status in db.execute(stmt).all()
+        )
+    return changed
+
+
+LOG_COLUMNS = (
+    LogBook.id,
+    LogBook.student_id,
+    Student.name,
+    LogBook.tipe,
+    LogBook.mengambil,
+    LogBook.mengembalikan,
+    LogBook.created_at,
+    Student.branch_id,
+)
+
+
+def log_query(
+    db: Session,
+    tipe: Optional[str] = None,
+    branch_id: Optional[int] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+):
+    """Projected LogBook + student rows, filtered in SQL.
+
+    Filters line up with the log_books indexes: tipe first, then the
+    log_date range, with (created_at, id) left for ordering.
+    """
+    query = db.query(*LOG_COLUMNS).join(Student, Student.id == LogBook.student_id)
+    if tipe:
+        query = query.filter(LogBook.tipe == tipe)
+    if branch_id:
+        query = query.filter(Student.branch_id == branch_id)
+    if date_from:
+        query = query.filter(LogBook.log_date >= date_from)
+    if date_to:
+        query = query.filter(LogBook.log_date <= date_to)
+    return query
+
+
+def log_row(r) -> dict:
+    return {
+        "id": r.id,
+        "student_id": r.student_id,
+        "name": r.name,
+        "tipe": r.tipe,
+        "mengambil": r.mengambil,
+        "mengembalikan": r.mengembalikan,
+        "created_at": r.created_at.strftime("%Y-%m-%d %H:%M:%S") if r.created_at else None,
+        "branch_id": r.branch_id,
+    }
+
+
+def list_logs(db: Session, page: PageParams, tipe: Optional[str] = None, branch_id: Optional[int] = None):
+    """One newest-first page of log rows; returns (items, next_cursor)."""
+    query = log_query(db, tipe, branch_id, page.date_from, page.date_to)
+    records, next_cursor = paginate(query, LogBook.created_at, LogBook.id, page)
+    return [log_row(r) for r in records], next_cursor
+
+
+EXPORT_FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+EXPORT_FIELDS = ("id", "student_id", "name", "tipe", "mengambil", "mengembalikan", "created_at", "branch_id")
+EXPORT_BATCH = 1000
+
+
+def stream_logs(
+    db: Session,
+    fmt: str,
+    tipe: Optional[str] = None,
+    branch_id: Optional[int] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+):
+    """Yield the filtered logs as CSV or NDJSON text chunks, oldest first.
+
+    Rows come from a server-side cursor ``EXPORT_BATCH`` at a time and each
+    batch is written out before the next is fetched, so memory stays flat
+    however long the history is.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"unknown export format {fmt}")
+
+    query = (
+        log_query(db, tipe, branch_id, date_from, date_to)
+        .order_by(LogBook.created_at, LogBook.id)
+        .execution_options(yield_per=EXPORT_BATCH)
+    )
+
+    buf = io.StringIO()
+    writer = csv.writer(buf) if fmt == "csv" else None
+    if writer:
+        writer.writerow(EXPORT_FIELDS)
+
+    for i, r in enumerate(query, start=1):
+        row = log_row(r)
+        if writer:
+            writer.writerow([row[f] for f in EXPORT_FIELDS])
+        else:
+            buf.write(json.dumps(row))
+            buf.write("\n")
+        if i % EXPORT_BATCH == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+
+    if buf.tell():
+        yield buf.getvalue()
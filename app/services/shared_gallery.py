@@ -0,0 +1,168 @@
+# app/services/shared_gallery.py
+"""Host-wide, read-only gallery matrices backed by mmap'd files.
+
+Each uvicorn worker still has its own GalleryRegistry, but the (n, 128)
+float32 matrices are written once per host into GALLERY_SHM_DIR (tmpfs by
+default) and mapped read-only, so the page cache holds a single copy no
+matter how many workers and sessions use it.
+
+Files are named after a hash of their bytes. Workers that reach the same
+snapshot map the same file, and a new snapshot is always a new file, so a
+swap never changes bytes a session is still reading. A replaced snapshot's
+file is unlinked right away; workers that still map it keep their pages
+until they drop it. Files left behind by crashed or restarted workers are
+swept at startup and shutdown. The files hold biometric embeddings, so the
+directory is private to the service user.
+"""
+import hashlib
+import os
+import time
+
+import numpy as np
+
+from app.core.config import GALLERY_SHM_DIR
+from app.models.types import EMBEDDING_DTYPE
+from app.services.face_matcher import EMBEDDING_DIM
+
+ROW_BYTES = EMBEDDING_DIM * EMBEDDING_DTYPE.itemsize
+TMP_GRACE_SECONDS = 60  # a younger .tmp file may still be being written
+
+
+def _mapped_by_others() -> set | None:
+    """Files mapped by the other processes on this host, from /proc; None without /proc."""
+    if not os.path.isdir("/proc"):
+        return None
+    own = str(os.getpid())
+    paths = set()
+    for pid in os.listdir("/proc"):
+        if not pid.isdigit() or pid == own:
+            continue
+        try:
+            with open(f"/proc/{pid}/maps") as f:
+                for line in f:
+                    fields = line.split(None, 5)
+                    if len(fields) == 6:
+                        paths.add(fields[5].rstrip("\n"))
+        except OSError:
+            continue  # exited meanwhile, or not ours to read
+    return paths
+
+
+def _readonly(matrix: np.ndarray) -> np.ndarray:
+    matrix = matrix.view()
+    matrix.flags.writeable = False
+    return matrix
+
+
+class SharedMatrixStore:
+    """Publishes gallery matrices as content-addressed files and maps them read-only."""
+
+    def __init__(self, directory: str | None = GALLERY_SHM_DIR):
+        self.directory = directory or None
+        self.reused = 0
+        self.written = 0
+        self.fallbacks = 0
+        if self.directory:
+            try:
+                os.makedirs(self.directory, mode=0o700, exist_ok=True)
+                os.chmod(self.directory, 0o700)  # makedirs leaves an existing directory's mode alone
+            except OSError as e:
+                print(f"⚠️ Shared gallery dir {self.directory} unavailable, galleries stay per worker:", e)
+                self.directory = None
+
+    def path_for(self, key, matrix: np.ndarray, tag: str = "") -> str:
+        name = "all" if key is None else f"b{key}"
+        digest = hashlib.blake2b(matrix.data, digest_size=12).hexdigest()
+        return os.path.join(self.directory, f"{name}{tag}-{digest}.f32")
+
+    def share(self, key, matrix: np.ndarray, tag: str = "") -> tuple[np.ndarray, str | None]:
+        """Return (read-only view of the host-wide file for this content, its path).
+
+        ``tag`` names derived matrices apart (e.g. "-ivf" for cell-ordered
+        copies). Falls back to a private read-only array (path None) when
+        sharing is disabled or the directory is full.
+        """
+        matrix = np.ascontiguousarray(matrix, dtype=EMBEDDING_DTYPE).reshape(-1, EMBEDDING_DIM)
+        if self.directory is None or len(matrix) == 0:  # an empty file cannot be mapped
+            return _readonly(matrix), None
+
+        path = self.path_for(key, matrix, tag)
+        try:
+            try:
+                shared = self._map(path, len(matrix))
+                self.reused += 1
+            except (FileNotFoundError, ValueError):
+                shared = self._write(path, matrix)
+                self.written += 1
+        except OSError as e:
+            self.fallbacks += 1
+            print(f"⚠️ Could not share gallery {os.path.basename(path)}, keeping a private copy:", e)
+            return _readonly(matrix), None
+        return shared, path
+
+    @staticmethod
+    def _map(path: str, rows: int) -> np.ndarray:
+        if os.path.getsize(path) != rows * ROW_BYTES:
+            raise ValueError(f"{path} has an unexpected size")
+        return np.memmap(path, dtype=EMBEDDING_DTYPE, mode="r", shape=(rows, EMBEDDING_DIM))
+
+    def _write(self, path: str, matrix: np.ndarray) -> np.ndarray:
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with os.fdopen(os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "wb") as f:
+                f.write(matrix.data)
+            # map before publishing, so a concurrent unlink of ``path`` can't pull it away from us
+            shared = self._map(tmp, len(matrix))
+            os.replace(tmp, path)  # atomic: other workers see the whole file or none
+        except BaseException:
+            self._unlink(tmp)
+            raise
+        return shared
+
+    def release(self, path: str | None, keep: str | None = None):
+        """Unlink the file behind a replaced snapshot (existing mappings stay valid)."""
+        if path and path != keep:
+            self._unlink(path)
+
+    def sweep(self) -> int:
+        """Unlink gallery files that no other process maps; returns how many.
+
+        Meant for startup and shutdown, when this worker maps nothing it
+        still needs. Skipped where /proc is not available.
+        """
+        if self.directory is None:
+            return 0
+        mapped = _mapped_by_others()
+        if mapped is None:
+            return 0
+        directory = os.path.realpath(self.directory)
+        removed = 0
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if not name.endswith((".f32", ".tmp")) or path in mapped:
+                continue
+            try:
+                if name.endswith(".tmp") and time.time() - os.path.getmtime(path) < TMP_GRACE_SECONDS:
+                    continue
+            except FileNotFoundError:
+                continue
+            self._unlink(path)
+            removed += 1
+        return removed
+
+    @staticmethod
+    def _unlink(path: str):
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass  # another worker got there first
+        except OSError as e:
+            print(f"⚠️ Could not remove stale gallery file {path}:", e)
+
+    def stats(self) -> dict:
+        return {
+            "dir": self.directory,
+            "reused": self.reused,
+            "written": self.written,
+            "fallbacks": self.fallbacks,
+        }
@@ -1,9 +1,9 @@
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
-from sqlalchemy.orm import Session
-from app.database import SessionLocal
-from app.models import User
+from app.database import run_in_db
+from app.utils.auth_cache import principal_cache, cached_principal, load_principal
+from app.utils.ttl_cache import MISSING
 import os
 
 SECRET_KEY = os.getenv("JWT_SECRET_KEY", "supersecretkey")
@@ -11,58 +11,32 @@ ALGORITHM = "HS256"
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+def _decode(token: str):
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id = payload.get("sub")
-        role = payload.get("role")
+    except JWTError:
+        raise HTTPException(status_code=401, detail="Token is invalid or expired")
+    user_id = payload.get("sub")
+    if not user_id:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    return user_id, payload.get("role")
 
-        if not user_id:
-            raise HTTPException(status_code=401, detail="Invalid token")
 
-        user = db.query(User).filter(User.id == user_id).first()
+def _with_role(principal, role):
+    if principal is None:
+        raise HTTPException(status_code=401, detail="User not found")
+    return {**principal, "role": role}
 
-        if not user:
-            raise HTTPException(status_code=401, detail="User not found")
-        
 
-        return {
-            "id": user.id,
-            "name": user.name,
-            "role": role,
-            "branch_id": user.branch_id
-        }
+async def authenticate_token(token: str):
+    """Token -> user dict {id, name, role, branch_id}; repeat callers are served from the principal cache."""
+    user_id, role = _decode(token)
+    principal = cached_principal(user_id)
+    if principal is MISSING:
+        principal = await run_in_db(load_principal, user_id)
+        principal_cache.set(user_id, principal)
+    return _with_role(principal, role)
 
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Token is invalid or expired")
-    
-def decode_token_get_user(token: str):
-    """Decode token string and return user dict {id, name, role, branch_id}"""
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id = payload.get("sub")
-        role = payload.get("role")
-        if not user_id:
-            raise HTTPException(status_code=401, detail="Invalid token payload")
-        db: Session = SessionLocal()
-        try:
-            user = db.query(User).filter(User.id == user_id).first()
-            if not user:
-                raise HTTPException(status_code=401, detail="User not found")
-            return {
-                "id": user.id,
-                "name": user.name,
-                "role": role,
-                "branch_id": user.branch_id
-            }
-        finally:
-            db.close()
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Token is invalid or expired")
+
+async def get_current_user(token: str = Depends(oauth2_scheme)):
+    return await authenticate_token(token)
@@ -0,0 +1,117 @@
+# app/utils/auth_cache.py
+"""Per-worker caches of auth lookups, invalidated across workers via pub/sub.
+
+Controllers that change a user call ``invalidate_user``; it drops the local
+entry right away and publishes the id so every other uvicorn worker drops it
+too. The TTL bounds staleness if a message is lost.
+"""
+import asyncio
+import os
+
+from sqlalchemy import select
+
+from app.database import SessionLocal
+from app.models import Role, User, UserRole
+from app.utils import events
+from app.utils.redis_client import get_redis
+from app.utils.ttl_cache import TTLCache
+
+AUTH_CHANNEL = "auth:invalidate"
+
+ROLE_CACHE_TTL = float(os.getenv("ROLE_CACHE_TTL", "60"))
+ROLE_CACHE_SIZE = int(os.getenv("ROLE_CACHE_SIZE", "1024"))
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "30"))
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "2048"))
+
+role_cache = TTLCache(maxsize=ROLE_CACHE_SIZE, ttl=ROLE_CACHE_TTL)
+# user id -> {id, name, branch_id}, or None for unknown/deleted users
+principal_cache = TTLCache(maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL)
+
+_loop: asyncio.AbstractEventLoop | None = None
+
+
+def load_user_roles(user_id: str) -> tuple:
+    """Role names of a user that is not soft-deleted (blocking; run via run_in_db)."""
+    db = SessionLocal()
+    try:
+        stmt = (
+            select(Role.name)
+            .join(UserRole, Role.id == UserRole.role_id)
+            .join(User, User.id == UserRole.user_id)
+            .where(UserRole.user_id == user_id, User.deleted_at.is_(None))
+        )
+        return tuple(r[0] for r in db.execute(stmt).all())
+    finally:
+        db.close()
+
+
+def load_principal(user_id: str) -> dict | None:
+    """id, name and branch_id of a user that is not soft-deleted (blocking)."""
+    db = SessionLocal()
+    try:
+        row = db.execute(
+            select(User.id, User.name, User.branch_id)
+            .where(User.id == user_id, User.deleted_at.is_(None))
+        ).first()
+        return {"id": row.id, "name": row.name, "branch_id": row.branch_id} if row else None
+    finally:
+        db.close()
+
+
+def cached_principal(user_id: str):
+    """Cached principal if known (MISSING otherwise); never touches the DB."""
+    return principal_cache.get(user_id)
+
+
+def _drop_local(user_id: str):
+    role_cache.invalidate(user_id)
+    principal_cache.invalidate(user_id)
+
+
+def _on_invalidate(data: bytes):
+    _drop_local(data.decode())
+
+
+def _clear_all():
+    role_cache.clear()
+    principal_cache.clear()
+
+
+def invalidate_user(user_id) -> None:
+    """Forget cached auth data of ``user_id`` in this and every other worker.
+
+    Safe to call from threadpool code (sync controllers): the publish is
+    handed to the event loop captured by ``install``.
+    """
+    user_id = str(user_id)
+    _drop_local(user_id)
+
+    loop = _loop
+    if loop is None or loop.is_closed():
+        return
+
+    async def publish():
+        try:
+            await get_redis().publish(AUTH_CHANNEL, user_id)
+        except Exception as e:
+            print("⚠️ Auth cache invalidation publish failed:", e)
+
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        loop.create_task(publish())
+    else:
+        asyncio.run_coroutine_threadsafe(publish(), loop)
+
+
+def install():
+    """Bind to the running loop and subscribe to invalidations (call at startup)."""
+    global _loop
+    _loop = asyncio.get_running_loop()
+    events.subscribe(AUTH_CHANNEL, _on_invalidate, on_reset=_clear_all)
+
+
+def stats() -> dict:
+    return {"roles": role_cache.stats(), "principals": principal_cache.stats()}
@@ -1,72 +1,382 @@
 # app/utils/cache_utils.py
+#
+# Layout per branch (bid 0 = students without a branch):
+#   students_by_branch:{bid}:meta     JSON list of {id, name, tipe_class, branch_id}
+#   students_by_branch:{bid}:emb      packed little-endian float32 matrix, one 128-d row per meta entry
+#   students_by_branch:{bid}:version  counter, bumped on every write to the branch entry
+#   students_by_branch:branches       JSON list of branch ids present in the cache
+#   students_by_branch:seed_lock      held by the one worker doing a full reseed
+#   students_by_branch:fresh          set after a full reseed; the periodic refresher skips while it exists
+#
+# Every write also publishes a gallery event on students_by_branch:events (see GALLERY_CHANNEL);
+# a full reseed only publishes "reload" events for the branches whose content changed.
+import asyncio
+import base64
 import json
-from typing import List, Dict, Any
-from app.database import SessionLocal
-from app.models import Student
-from app.utils.redis_client import get_redis
+import time
+import uuid
+from typing import List, Dict, Any, Tuple, Callable
+
+import numpy as np
+from redis.exceptions import WatchError
+from app.database import SessionLocal, run_in_db
+from app.models import Student, Branch
+from app.models.types import EMBEDDING_DTYPE
+from app.services.face_matcher import EMBEDDING_DIM
+from app.utils.redis_client import get_redis_raw
 from sqlalchemy.orm import Session
 
 # Redis key prefix
 PREFIX = "students_by_branch"
+BRANCHES_KEY = f"{PREFIX}:branches"
+SEED_LOCK_KEY = f"{PREFIX}:seed_lock"
+FRESH_KEY = f"{PREFIX}:fresh"
+GALLERY_CHANNEL = f"{PREFIX}:events"
+
+SEED_LOCK_TTL_MS = 60_000
+SEED_WAIT_TIMEOUT = 30.0
+SEED_RETRIES = 3
+REFRESH_INTERVAL = 300
+
+# compare-and-delete so a worker never releases a lock another worker re-acquired
+_RELEASE_LOCK = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+def meta_key(bid: int) -> str:
+    return f"{PREFIX}:{bid}:meta"
+
+
+def emb_key(bid: int) -> str:
+    return f"{PREFIX}:{bid}:emb"
+
+
+def version_key(bid: int) -> str:
+    return f"{PREFIX}:{bid}:version"
 
-def _student_to_dict(s: Student) -> Dict[str, Any]:
+
+def _student_meta(s) -> Dict[str, Any]:
     return {
         "id": s.id,
         "name": s.name,
         "tipe_class": getattr(s, "tipe_class", None),
         "branch_id": s.branch_id,
-        # ensure embedding is serializable (list of floats)
-        "face_embedding": s.face_embedding if s.face_embedding else None,
     }
 
-async def seed_students_cache():
-    """Fetch all students from DB and write grouped data into redis."""
-    redis = get_redis()
+
+def pack_embeddings(embeddings) -> bytes:
+    if len(embeddings) == 0:
+        return b""
+    return np.asarray(embeddings, dtype=EMBEDDING_DTYPE).reshape(-1, EMBEDDING_DIM).tobytes()
+
+
+def unpack_embeddings(blob: bytes | None) -> np.ndarray:
+    if not blob:
+        return np.empty((0, EMBEDDING_DIM), dtype=EMBEDDING_DTYPE)
+    return np.frombuffer(blob, dtype=EMBEDDING_DTYPE).reshape(-1, EMBEDDING_DIM)
+
+
+def upsert_row(students: list, matrix: np.ndarray, meta: dict, row: np.ndarray):
+    """Return (students, matrix) with the row for meta["id"] replaced or appended (inputs untouched)."""
+    row = np.asarray(row, dtype=EMBEDDING_DTYPE).reshape(1, EMBEDDING_DIM)
+    ids = [s["id"] for s in students]
+    if meta["id"] in ids:
+        i = ids.index(meta["id"])
+        matrix = matrix.copy()
+        matrix[i] = row[0]
+        return students[:i] + [meta] + students[i + 1:], matrix
+    return students + [meta], np.vstack([matrix, row])
+
+
+def remove_row(students: list, matrix: np.ndarray, student_id: int):
+    """Return (students, matrix) without student_id, or None if it is not there."""
+    ids = [s["id"] for s in students]
+    if student_id not in ids:
+        return None
+    i = ids.index(student_id)
+    return students[:i] + students[i + 1:], np.delete(matrix, i, axis=0)
+
+
+def gallery_event(op: str, branch_id: int | None = None, version: int | None = None, **fields) -> bytes:
+    event = {"op": op, "branch_id": branch_id, "version": version, **fields}
+    if "embedding" in event:
+        event["embedding"] = base64.b64encode(pack_embeddings(event["embedding"])).decode()
+    return json.dumps(event).encode()
+
+
+def parse_gallery_event(data: bytes) -> dict:
+    event = json.loads(data)
+    if event.get("embedding"):
+        event["embedding"] = unpack_embeddings(base64.b64decode(event["embedding"]))[0]
+    return event
+
+
+# ---------------------------------------------------------------------------
+# Full reseed
+# ---------------------------------------------------------------------------
+def _load_students_grouped() -> dict[int, tuple[list, list]]:
     db: Session = SessionLocal()
     try:
-        students: List[Student] = db.query(Student).all()
-        grouped: dict[int, list] = {}
-        for s in students:
-            bid = s.branch_id or 0
-            grouped.setdefault(bid, []).append(_student_to_dict(s))
-
-        # store each branch list as JSON
-        # Also store a list of branch ids for easy ADMIN retrieval
-        branch_ids = []
-        for bid, arr in grouped.items():
-            key = f"{PREFIX}:{bid}"
-            await redis.set(key, json.dumps(arr))
-            branch_ids.append(bid)
-
-        await redis.set(f"{PREFIX}:branches", json.dumps(branch_ids))
-        return True
+        rows = (
+            db.query(Student.id, Student.name, Student.tipe_class, Student.branch_id, Student.face_embedding)
+            .filter(Student.face_embedding.isnot(None))
+            .order_by(Student.id)
+            .all()
+        )
+        branch_ids = [b.id for b in db.query(Branch.id).all()]
     finally:
         db.close()
 
-async def get_students_by_branch(branch_id: int | None):
-    """Return list of student dicts for branch_id.
-    If branch_id is None => return all students (combine branches).
+    # every branch gets an entry, even an empty one, so kiosks of new branches don't miss forever
+    grouped: dict[int, tuple[list, list]] = {bid: ([], []) for bid in branch_ids}
+    for s in rows:
+        if len(s.face_embedding) != EMBEDDING_DIM:
+            continue
+        meta, embs = grouped.setdefault(s.branch_id or 0, ([], []))
+        meta.append(_student_meta(s))
+        embs.append(s.face_embedding)
+    return grouped
+
+
+async def seed_students_cache():
+    """Fetch all students with an embedding from DB and write packed per-branch entries into redis.
+
+    The write is a WATCHed transaction on every branch version, so a
+    write-through patch landing between the DB read and the redis write
+    makes the seed retry instead of being overwritten by older data.
     """
-    redis = get_redis()
+    redis = get_redis_raw()
+    for _ in range(SEED_RETRIES):
+        previous = await redis.get(BRANCHES_KEY)
+        known = set(json.loads(previous)) if previous else set()
+        watched = [version_key(bid) for bid in sorted(known)]
+
+        async with redis.pipeline(transaction=True) as pipe:
+            await pipe.watch(BRANCHES_KEY, *watched)
+            grouped = await run_in_db(_load_students_grouped)
+            bids = sorted(set(grouped) | known)
+            keys = []
+            for bid in bids:
+                keys += [meta_key(bid), emb_key(bid), version_key(bid)]
+            values = await pipe.mget(keys) if keys else []
+            current = {
+                bid: (meta_json, blob, int(version or 0))
+                for bid, meta_json, blob, version in zip(bids, values[0::3], values[1::3], values[2::3])
+            }
+            try:
+                pipe.multi()
+                changed = {}  # {branch_id: new version}
+                for bid, (meta, embs) in grouped.items():
+                    meta_json, blob = json.dumps(meta).encode(), pack_embeddings(embs)
+                    old_meta, old_blob, version = current[bid]
+                    if old_meta == meta_json and (old_blob or b"") == blob:
+                        continue  # unchanged: keep the version so workers keep their galleries
+                    pipe.set(meta_key(bid), meta_json)
+                    pipe.set(emb_key(bid), blob)
+                    pipe.set(version_key(bid), version + 1)
+                    changed[bid] = version + 1
+                for bid in known - set(grouped):
+                    pipe.delete(meta_key(bid), emb_key(bid))
+                    pipe.set(version_key(bid), current[bid][2] + 1)
+                    changed[bid] = current[bid][2] + 1
+                pipe.set(BRANCHES_KEY, json.dumps(sorted(grouped)))
+                # only branches whose content differs are reloaded by the workers
+                for bid, version in changed.items():
+                    pipe.publish(GALLERY_CHANNEL, gallery_event("reload", branch_id=bid, version=version))
+                await pipe.execute()
+                return True
+            except WatchError:
+                continue
+    print("⚠️ Students cache seed kept conflicting with concurrent updates")
+    return False
+
+
+_local_seed: asyncio.Future | None = None
+
+
+async def reseed_students_cache(wait_timeout: float = SEED_WAIT_TIMEOUT, fresh: bool = False) -> bool:
+    """Single-flight full reseed.
+
+    Within a worker concurrent callers share one task; across workers a
+    redis lock lets one worker rebuild while the others wait for it to
+    finish. Returns True if this call performed the rebuild.
+
+    A reseed already in flight may have read the database before the
+    caller's last commit. With ``fresh`` it is waited out and a new one
+    runs, so the cache reflects everything committed before this call;
+    False then means the wait timed out.
+    """
+    global _local_seed
+    if fresh:
+        while _local_seed is not None and not _local_seed.done():
+            await asyncio.wait([_local_seed])
+        _local_seed = asyncio.ensure_future(_reseed_guarded(wait_timeout, fresh=True))
+    elif _local_seed is None or _local_seed.done():
+        _local_seed = asyncio.ensure_future(_reseed_guarded(wait_timeout))
+    return await asyncio.shield(_local_seed)
+
+
+async def _reseed_guarded(wait_timeout: float, fresh: bool = False) -> bool:
+    redis = get_redis_raw()
+    token = uuid.uuid4().hex
+    deadline = time.monotonic() + wait_timeout
+    while True:
+        if await redis.set(SEED_LOCK_KEY, token, nx=True, px=SEED_LOCK_TTL_MS):
+            try:
+                await seed_students_cache()
+                await redis.set(FRESH_KEY, b"1", ex=REFRESH_INTERVAL)
+                return True
+            finally:
+                await redis.eval(_RELEASE_LOCK, 1, SEED_LOCK_KEY, token)
+
+        while await redis.exists(SEED_LOCK_KEY):
+            if time.monotonic() > deadline:
+                print("⚠️ Timed out waiting for another worker to reseed students cache")
+                if fresh:
+                    # the cache may miss our caller's rows; let the periodic refresh run again
+                    await redis.delete(FRESH_KEY)
+                return False
+            await asyncio.sleep(0.1)
+        if not fresh:
+            return False
+        # the other worker's seed may predate our caller's commit; take the lock and seed again
+
+
+async def refresh_students_cache_if_stale() -> bool:
+    """Periodic safety-net reseed; at most one worker per REFRESH_INTERVAL does it."""
+    redis = get_redis_raw()
+    if await redis.exists(FRESH_KEY):
+        return False
+    return await reseed_students_cache()
+
+
+async def ensure_students_cache() -> bool:
+    """Seed at boot only when nothing is cached yet (not once per uvicorn worker)."""
+    if await get_redis_raw().exists(BRANCHES_KEY):
+        return False
+    return await reseed_students_cache()
+
+
+# ---------------------------------------------------------------------------
+# Incremental write-through
+# ---------------------------------------------------------------------------
+async def _patch_branch(bid: int, patch: Callable[[list, np.ndarray], tuple[list, np.ndarray, dict] | None]) -> int | None:
+    """Apply ``patch(students, matrix)`` to one branch entry atomically.
+
+    ``patch`` returns ``(students, matrix, event_fields)`` or None when
+    nothing changes. The new entry, the bumped version and the gallery event
+    are written in one MULTI. Returns the new branch version, or None when
+    nothing changed. Branches that are not cached yet get an entry (and are
+    added to the branch list).
+    """
+    redis = get_redis_raw()
+    async with redis.pipeline(transaction=True) as pipe:
+        while True:
+            try:
+                await pipe.watch(meta_key(bid), emb_key(bid), version_key(bid), BRANCHES_KEY)
+                meta_json, blob, version, branches_json = await pipe.mget(
+                    meta_key(bid), emb_key(bid), version_key(bid), BRANCHES_KEY
+                )
+                if branches_json is None:
+                    # nothing cached at all; the next read reseeds from the DB
+                    await pipe.reset()
+                    return None
+                students = json.loads(meta_json) if meta_json else []
+                patched = patch(students, unpack_embeddings(blob))
+                if patched is None:
+                    await pipe.reset()
+                    return None
+                students, matrix, fields = patched
+                new_version = int(version or 0) + 1
+
+                pipe.multi()
+                pipe.set(meta_key(bid), json.dumps(students))
+                pipe.set(emb_key(bid), pack_embeddings(matrix))
+                pipe.set(version_key(bid), new_version)
+                branch_ids = json.loads(branches_json)
+                if bid not in branch_ids:
+                    pipe.set(BRANCHES_KEY, json.dumps(sorted(branch_ids + [bid])))
+                pipe.publish(GALLERY_CHANNEL, gallery_event(branch_id=bid, version=new_version, **fields))
+                await pipe.execute()
+                return new_version
+            except WatchError:
+                continue
+
+
+async def cache_upsert_student(student, embedding) -> int | None:
+    """Add or replace one student row in its branch entry."""
+    meta = _student_meta(student)
+    row = np.asarray(embedding, dtype=EMBEDDING_DTYPE).reshape(EMBEDDING_DIM)
+
+    def patch(students, matrix):
+        students, matrix = upsert_row(students, matrix, meta, row)
+        return students, matrix, {"op": "upsert", "student": meta, "embedding": row}
+
+    return await _patch_branch(student.branch_id or 0, patch)
+
+
+async def cache_remove_student(student_id: int, branch_id: int | None) -> int | None:
+    """Drop one student row from its branch entry."""
+
+    def patch(students, matrix):
+        removed = remove_row(students, matrix, student_id)
+        if removed is None:
+            return None
+        return *removed, {"op": "remove", "student_id": student_id}
+
+    return await _patch_branch(branch_id or 0, patch)
+
+
+# ---------------------------------------------------------------------------
+# Reads
+# ---------------------------------------------------------------------------
+async def _read_gallery(redis, branch_id: int | None):
     if branch_id is None:
-        # admin -> combine all stored branches
-        branches_json = await redis.get(f"{PREFIX}:branches")
-        if not branches_json:
-            # cache miss
-            await seed_students_cache()
-            branches_json = await redis.get(f"{PREFIX}:branches") or "[]"
+        branches_json = await redis.get(BRANCHES_KEY)
+        if branches_json is None:
+            return None
         branch_ids = json.loads(branches_json)
-        all_students = []
-        for bid in branch_ids:
-            arr_json = await redis.get(f"{PREFIX}:{bid}")
-            if arr_json:
-                all_students.extend(json.loads(arr_json))
-        return all_students
-
-    # teacher -> specific branch
-    arr_json = await redis.get(f"{PREFIX}:{branch_id}")
-    if not arr_json:
-        # cache miss -> refresh cache then try again
-        await seed_students_cache()
-        arr_json = await redis.get(f"{PREFIX}:{branch_id}") or "[]"
-    return json.loads(arr_json)
+    else:
+        branch_ids = [branch_id]
+    if not branch_ids:
+        return [], unpack_embeddings(None), {}
+
+    keys = []
+    for bid in branch_ids:
+        keys += [meta_key(bid), emb_key(bid), version_key(bid)]
+    values = await redis.mget(keys)
+
+    students, blobs, versions = [], [], {}
+    for bid, meta_json, blob, version in zip(branch_ids, values[0::3], values[1::3], values[2::3]):
+        if meta_json is None:
+            if branch_id is not None:
+                return None  # cache miss for this branch
+            continue
+        students.extend(json.loads(meta_json))
+        blobs.append(blob or b"")
+        versions[bid] = int(version or 0)
+    matrix = unpack_embeddings(blobs[0] if len(blobs) == 1 else b"".join(blobs))
+    return students, matrix, versions
+
+
+async def load_branch_gallery(branch_id: int | None) -> Tuple[List[Dict[str, Any]], np.ndarray, Dict[int, int]]:
+    """Like get_branch_gallery, plus the {branch_id: version} the data was read at."""
+    redis = get_redis_raw()
+    gallery = await _read_gallery(redis, branch_id)
+    if gallery is None:
+        # cache miss -> single-flight reseed (or wait for the worker doing it) then try again
+        await reseed_students_cache()
+        gallery = await _read_gallery(redis, branch_id)
+    return gallery or ([], unpack_embeddings(None), {})
+
+
+async def get_branch_gallery(branch_id: int | None) -> Tuple[List[Dict[str, Any]], np.ndarray]:
+    """Return (student metadata, (n, 128) float32 matrix) for branch_id.
+    If branch_id is None => all branches combined (ADMIN).
+    """
+    students, matrix, _ = await load_branch_gallery(branch_id)
+    return students, matrix
@@ -0,0 +1,119 @@
+# app/utils/db_metrics.py
+import os
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "200"))
+SLOW_SAMPLES = 50
+
+
+class QueryStats:
+    """Queries issued while handling one request (or one unit of background work)."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.slow: list[dict] = []
+
+    def as_dict(self) -> dict:
+        return {"count": self.count, "total_ms": round(self.total_ms, 2), "slow": self.slow}
+
+
+request_query_stats: ContextVar[QueryStats | None] = ContextVar("request_query_stats", default=None)
+
+_lock = threading.Lock()
+_totals = {"queries": 0, "total_ms": 0.0, "slow_queries": 0}
+_slow_samples: deque = deque(maxlen=SLOW_SAMPLES)
+_pool_waits = {"checkouts": 0, "wait_total_ms": 0.0, "wait_max_ms": 0.0, "timeouts": 0}
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except Exception:
+            with _lock:
+                _pool_waits["timeouts"] += 1
+            raise
+        finally:
+            waited = (time.perf_counter() - start) * 1000
+            with _lock:
+                _pool_waits["checkouts"] += 1
+                _pool_waits["wait_total_ms"] += waited
+                _pool_waits["wait_max_ms"] = max(_pool_waits["wait_max_ms"], waited)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = (time.perf_counter() - conn.info["query_start"].pop()) * 1000
+    slow = elapsed >= SLOW_QUERY_MS
+    sample = {"ms": round(elapsed, 2), "statement": " ".join(statement.split())[:500]} if slow else None
+
+    stats = request_query_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.total_ms += elapsed
+        if slow and len(stats.slow) < 5:
+            stats.slow.append(sample)
+
+    with _lock:
+        _totals["queries"] += 1
+        _totals["total_ms"] += elapsed
+        if slow:
+            _totals["slow_queries"] += 1
+            _slow_samples.append({**sample, "at": time.time()})
+
+
+def _handle_error(context):
+    # a failed statement never reaches after_cursor_execute; drop its start time
+    conn = context.connection
+    if conn is not None and context.statement is not None and conn.info.get("query_start"):
+        conn.info["query_start"].pop()
+
+
+def instrument_engine(engine):
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+def pool_status(engine) -> dict:
+    pool = engine.pool
+    status = {"class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            "size": pool.size(),
+            "max_overflow": pool._max_overflow,
+            "timeout": pool.timeout(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+        })
+    with _lock:
+        waits = dict(_pool_waits)
+    waits["wait_avg_ms"] = round(waits["wait_total_ms"] / waits["checkouts"], 3) if waits["checkouts"] else 0.0
+    waits["wait_total_ms"] = round(waits["wait_total_ms"], 2)
+    waits["wait_max_ms"] = round(waits["wait_max_ms"], 2)
+    status["checkout_waits"] = waits
+    return status
+
+
+def query_totals() -> dict:
+    with _lock:
+        totals = dict(_totals)
+        slow = list(_slow_samples)
+    totals["total_ms"] = round(totals["total_ms"], 2)
+    totals["slow_threshold_ms"] = SLOW_QUERY_MS
+    totals["slow_samples"] = slow
+    return totals
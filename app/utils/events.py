@@ -0,0 +1,49 @@
+# app/utils/events.py
+import asyncio
+from typing import Callable, Dict, List
+
+from app.utils.redis_client import get_redis_raw
+
+# channel -> [(on_message(data: bytes), on_reset())]
+_handlers: Dict[str, List[tuple]] = {}
+
+
+def subscribe(channel: str, on_message: Callable[[bytes], None], on_reset: Callable[[], None] | None = None):
+    """Register a handler for a redis pub/sub channel.
+
+    ``on_reset`` runs after every (re)subscription, since messages published
+    while the listener was disconnected are lost and local state may be stale.
+    """
+    _handlers.setdefault(channel, []).append((on_message, on_reset))
+
+
+async def listen():
+    """Dispatch pub/sub messages to registered handlers until cancelled; reconnects on errors."""
+    while True:
+        pubsub = get_redis_raw().pubsub()
+        try:
+            await pubsub.subscribe(*_handlers)
+            for handlers in _handlers.values():
+                for _, on_reset in handlers:
+                    if on_reset:
+                        on_reset()
+
+            async for message in pubsub.listen():
+                if message["type"] != "message":
+                    continue
+                channel = message["channel"].decode()
+                for on_message, _ in _handlers.get(channel, []):
+                    try:
+                        on_message(message["data"])
+                    except Exception as e:
+                        print(f"⚠️ Event handler error on {channel}:", e)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print("⚠️ Event listener disconnected:", e)
+            await asyncio.sleep(1)
+        finally:
+            try:
+                await pubsub.aclose()
+            except Exception:
+                pass
@@ -0,0 +1,103 @@
+# app/utils/frame_protocol.py
+"""Kiosk frame wire formats for /ws/log-laptop and /ws/log-hp.
+
+json (legacy)  text message: {"frame": "data:image/jpeg;base64,...", "action": "mengambil", "seq": 1}
+binary         bytes message: 8 byte header + raw JPEG bytes
+
+    offset  size  field
+    0       1     magic   b"L"
+    1       1     version 1
+    2       1     action  1 = mengambil, 2 = mengembalikan
+    3       1     reserved
+    4       4     seq     uint32, big endian
+
+A client opts into binary per connection with the ``logcam.bin.v1``
+WebSocket subprotocol or the ``?proto=bin`` query parameter; everything
+else keeps the JSON/base64 path.
+"""
+import base64
+import json
+import struct
+from typing import NamedTuple
+
+from fastapi import WebSocket
+
+BINARY_SUBPROTOCOL = "logcam.bin.v1"
+MAGIC = b"L"
+VERSION = 1
+HEADER = struct.Struct("!cBBxI")
+
+ACTION_CODES = {1: "mengambil", 2: "mengembalikan"}
+ACTION_NAMES = {v: k for k, v in ACTION_CODES.items()}
+
+
+class FrameError(ValueError):
+    pass
+
+
+class Frame(NamedTuple):
+    action: str
+    seq: int | None
+    buf: bytes  # encoded image; data starts at `offset` so no slicing copy is needed
+    offset: int
+
+
+def select_subprotocol(websocket: WebSocket) -> str | None:
+    """Subprotocol to echo back in accept(), if the client offered ours."""
+    offered = websocket.headers.get("sec-websocket-protocol", "")
+    if BINARY_SUBPROTOCOL in [p.strip() for p in offered.split(",")]:
+        return BINARY_SUBPROTOCOL
+    return None
+
+
+def is_binary(websocket: WebSocket) -> bool:
+    return (
+        select_subprotocol(websocket) is not None
+        or websocket.query_params.get("proto", "").lower() in ("bin", "binary")
+    )
+
+
+def encode_binary_frame(jpeg: bytes, action: str = "mengambil", seq: int = 0) -> bytes:
+    return HEADER.pack(MAGIC, VERSION, ACTION_NAMES[action], seq & 0xFFFFFFFF) + jpeg
+
+
+def parse_binary_frame(data: bytes) -> Frame:
+    if len(data) <= HEADER.size:
+        raise FrameError("frame too short")
+    magic, version, action_code, seq = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise FrameError("unsupported frame header")
+    action = ACTION_CODES.get(action_code)
+    if action is None:
+        raise FrameError(f"unknown action code {action_code}")
+    return Frame(action=action, seq=seq, buf=data, offset=HEADER.size)
+
+
+def b64_to_bytes(b64str: str) -> bytes:
+    header, data = b64str.split(",", 1) if "," in b64str else (None, b64str)
+    return base64.b64decode(data)
+
+
+def parse_json_frame(text: str) -> Frame:
+    payload = json.loads(text)
+    if not isinstance(payload, dict):
+        raise FrameError("frame message must be an object")
+    b64str = payload.get("frame")
+    if not b64str or not isinstance(b64str, str):
+        raise FrameError("missing frame")
+    action = payload.get("action", "mengambil")
+    if action not in ACTION_NAMES:
+        # counted as an invalid frame; the session keeps running
+        raise FrameError(f"unknown action {action!r}")
+    return Frame(
+        action=action,
+        seq=payload.get("seq"),
+        buf=b64_to_bytes(b64str),
+        offset=0,
+    )
+
+
+async def receive_frame(websocket: WebSocket, binary: bool) -> Frame:
+    if binary:
+        return parse_binary_frame(await websocket.receive_bytes())
+    return parse_json_frame(await websocket.receive_text())
@@ -0,0 +1,115 @@
+# app/utils/pagination.py
+import base64
+import json
+import uuid
+from datetime import date, datetime, time, timedelta
+
+from fastapi import HTTPException, Query
+from sqlalchemy import Integer, tuple_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+MAX_UNPAGED_ROWS = 2000  # newest rows an unpaged (legacy) request still gets
+
+
+class PageParams:
+    """Query parameters shared by the paginated listings (use with ``Depends``).
+
+    Without ``limit`` and ``cursor`` a listing keeps its original response
+    shape for clients that predate pagination, capped at the newest
+    MAX_UNPAGED_ROWS rows.
+    """
+
+    def __init__(
+        self,
+        limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE, description=f"page size (default {DEFAULT_PAGE_SIZE} when a cursor is given)"),
+        cursor: str | None = Query(None, description="next_cursor from the previous page"),
+        date_from: date | None = Query(None),
+        date_to: date | None = Query(None, description="inclusive"),
+    ):
+        self.limit = limit
+        self.cursor = cursor
+        self.date_from = date_from
+        self.date_to = date_to
+
+    @property
+    def paged(self) -> bool:
+        return self.limit is not None or self.cursor is not None
+
+    @property
+    def size(self) -> int:
+        return self.limit or DEFAULT_PAGE_SIZE
+
+
+def encode_cursor(created_at: datetime | None, row_id) -> str:
+    row_id = row_id if isinstance(row_id, int) else str(row_id)
+    raw = json.dumps([created_at.isoformat() if created_at else None, row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, int_ids: bool = True):
+    """Return (created_at or None, row id); any malformed cursor is a 400."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        if created_at is not None:
+            created_at = datetime.fromisoformat(created_at)
+        if int_ids:
+            if type(row_id) is not int:
+                raise ValueError("cursor id must be an integer")
+        else:
+            row_id = str(uuid.UUID(row_id))
+        return created_at, row_id
+    except (ValueError, TypeError, AttributeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def filter_date_range(query, column, page: PageParams, on_date: bool = False):
+    """Restrict ``column`` to [date_from, date_to]; ``on_date`` for DATE columns."""
+    if page.date_from:
+        start = page.date_from if on_date else datetime.combine(page.date_from, time.min)
+        query = query.filter(column >= start)
+    if page.date_to:
+        if on_date:
+            query = query.filter(column <= page.date_to)
+        else:
+            query = query.filter(column < datetime.combine(page.date_to + timedelta(days=1), time.min))
+    return query
+
+
+def paginate(query, created_col, id_col, page: PageParams):
+    """Newest-first keyset page on (created_at, id).
+
+    ``created_col`` and ``id_col`` must be part of the query's projection.
+    Rows without a created_at come after all dated rows, newest id first.
+    Returns (rows, next_cursor); next_cursor is None on the last page and
+    when the request is not paged (the newest MAX_UNPAGED_ROWS rows).
+    """
+    if not page.paged:
+        query = query.order_by(created_col.desc().nulls_last(), id_col.desc())
+        return query.limit(MAX_UNPAGED_ROWS).all(), None
+
+    limit = page.size
+    created_at, row_id = None, None
+    if page.cursor:
+        created_at, row_id = decode_cursor(page.cursor, isinstance(id_col.type, Integer))
+
+    rows = []
+    # dated rows first; a cursor without created_at is already past them
+    if page.cursor is None or created_at is not None:
+        dated = query.filter(created_col.isnot(None))
+        if page.cursor:
+            dated = dated.filter(tuple_(created_col, id_col) < tuple_(created_at, row_id))
+        rows = dated.order_by(created_col.desc(), id_col.desc()).limit(limit + 1).all()
+    if len(rows) <= limit:
+        undated = query.filter(created_col.is_(None))
+        if page.cursor and created_at is None:
+            undated = undated.filter(id_col < row_id)
+        rows += undated.order_by(id_col.desc()).limit(limit + 1 - len(rows)).all()
+
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]._mapping
+    return rows, encode_cursor(last[created_col], last[id_col])
@@ -15,9 +15,29 @@ interface DetectionResult {
 interface WebSocketResponse {
   type?: "frame" | "result";
   image?: string;
+  seq?: number | null;
   results: DetectionResult[];
 }
 
+// Binary frame protocol (see app/utils/frame_protocol.py): 8 byte header + raw JPEG
+const BINARY_SUBPROTOCOL = "logcam.bin.v1";
+const ACTION_CODES = { mengambil: 1, mengembalikan: 2 } as const;
+
+const encodeBinaryFrame = (
+  jpeg: ArrayBuffer,
+  action: "mengambil" | "mengembalikan",
+  seq: number
+) => {
+  const out = new Uint8Array(8 + jpeg.byteLength);
+  const view = new DataView(out.buffer);
+  view.setUint8(0, 0x4c); // "L"
+  view.setUint8(1, 1);
+  view.setUint8(2, ACTION_CODES[action]);
+  view.setUint32(4, seq >>> 0);
+  out.set(new Uint8Array(jpeg), 8);
+  return out.buffer;
+};
+
 export default function OpenCVCameraComponent() {
   const queryClient = useQueryClient();
   const { mutate: saveDetection } = useSaveFetection();
@@ -33,6 +53,9 @@ export default function OpenCVCameraComponent() {
     null
   );
   const manuallyStoppedRef = useRef(false);
+  const seqRef = useRef(0);
+  // whether the next connection offers the binary subprotocol (JSON frames otherwise)
+  const binaryRef = useRef(true);
 
   const [isConnected, setIsConnected] = useState(false);
   const [results, setResults] = useState<DetectionResult[]>([]);
@@ -195,9 +218,23 @@ export default function OpenCVCameraComponent() {
       const ctx = canvas.getContext("2d");
       if (!ctx) return;
       ctx.drawImage(video, 0, 0, canvas.width, canvas.height);
+      const ws = wsRef.current;
+      const seq = ++seqRef.current;
+      if (ws.protocol === BINARY_SUBPROTOCOL) {
+        canvas.toBlob(
+          async (blob) => {
+            if (!blob || ws.readyState !== WebSocket.OPEN) return;
+            const payload = encodeBinaryFrame(await blob.arrayBuffer(), action, seq);
+            ws.send(payload);
+          },
+          "image/jpeg",
+          0.6
+        );
+        return;
+      }
       const frameData = canvas.toDataURL("image/jpeg", 0.6);
       console.log("Sending frame to WebSocket, size:", frameData.length);
-      wsRef.current.send(JSON.stringify({ frame: frameData, action: action }));
+      ws.send(JSON.stringify({ frame: frameData, action: action, seq }));
     } catch (err) {
       console.log("sendFrame error:", err);
     }
@@ -217,8 +254,13 @@ export default function OpenCVCameraComponent() {
     try {
       const { url, action } = getWsConfig();
       console.log("Starting WebSocket connection to:", url);
-      wsRef.current = new WebSocket(url);
+      // browsers fail the handshake when the server doesn't echo the subprotocol,
+      // so a socket that closes before opening is retried without it
+      const offerBinary = binaryRef.current;
+      let opened = false;
+      wsRef.current = new WebSocket(url, offerBinary ? [BINARY_SUBPROTOCOL] : undefined);
       wsRef.current.onopen = () => {
+        opened = true;
         console.log("WebSocket connected!");
         setIsConnected(true);
         setError(null);
@@ -246,6 +288,8 @@ export default function OpenCVCameraComponent() {
         if (intervalRef.current) clearInterval(intervalRef.current);
         if (timerRef.current) clearInterval(timerRef.current);
         setIsConnected(false);
+        // never opened: next attempt offers the other framing (both work with the current server)
+        if (!opened) binaryRef.current = !offerBinary;
         if (!manuallyStoppedRef.current) scheduleReconnect();
       };
       wsRef.current.onerror = (e) => {
@@ -1,8 +1,7 @@
-import api from "@/lib/api";
 import { API_BASE } from "@/lib/config";
+import { fetchAllPages } from "@/lib/pagination";
 import { Students } from "@/types/auth";
 import { useQuery } from "@tanstack/react-query";
-import axios from "axios";
 
 export function useStudent(selectedBranch?: number) {
   const userString = localStorage.getItem("user");
@@ -11,18 +10,17 @@ export function useStudent(selectedBranch?: number) {
   return useQuery({
     queryKey: ["students", user?.role, user?.branch_id, selectedBranch],
     queryFn: async () => {
-      const res = await api.get(`${API_BASE}/students/all`);
-
-      const allData: Students[] = res.data.users;
-
+      // the server filters by branch (teachers always get their own branch)
       if (user?.role === "TEACHER") {
-        return allData.filter((s) => s.branch_id === user.branch_id);
+        return fetchAllPages<Students>(`${API_BASE}/students/all`, "users", {
+          branch_id: user.branch_id,
+        });
       }
 
       if (user?.role === "ADMIN") {
-        return selectedBranch
-          ? allData.filter((s) => s.branch_id === Number(selectedBranch))
-          : allData;
+        return fetchAllPages<Students>(`${API_BASE}/students/all`, "users", {
+          branch_id: selectedBranch ? Number(selectedBranch) : null,
+        });
       }
 
       return [];
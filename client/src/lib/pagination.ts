@@ -0,0 +1,61 @@
+import api from "@/lib/api";
+
+// largest page the backend serves (MAX_PAGE_SIZE in app/utils/pagination.py)
+const PAGE_SIZE = 500;
+
+type ListParams = Record<string, string | number | null | undefined>;
+
+export interface Page<T> {
+  items: T[];
+  nextCursor: string | null;
+}
+
+// empty params (e.g. a null branch_id for admins) are left out of the query
+function cleanParams(params: ListParams): Record<string, string | number> {
+  const query: Record<string, string | number> = {};
+  for (const [name, value] of Object.entries(params)) {
+    if (value !== null && value !== undefined && value !== "") query[name] = value;
+  }
+  return query;
+}
+
+/**
+ * Fetch one page of a keyset-paginated listing; pass the previous page's
+ * nextCursor to continue.
+ */
+export async function fetchPage<T>(
+  url: string,
+  key: string,
+  params: ListParams = {},
+  limit = 50,
+  cursor: string | null = null
+): Promise<Page<T>> {
+  const query = { ...cleanParams(params), limit, ...(cursor ? { cursor } : {}) };
+  const res = await api.get(url, { params: query });
+  return { items: res.data[key] ?? [], nextCursor: res.data.next_cursor ?? null };
+}
+
+/**
+ * Fetch every row of a keyset-paginated listing by following next_cursor.
+ * Only for bounded listings (a roster, or logs filtered to a date range);
+ * log history must be read a page at a time with fetchPage.
+ */
+export async function fetchAllPages<T>(
+  url: string,
+  key: string,
+  params: ListParams = {}
+): Promise<T[]> {
+  const items: T[] = [];
+  let cursor: string | null = null;
+  do {
+    const page: Page<T> = await fetchPage<T>(url, key, params, PAGE_SIZE, cursor);
+    items.push(...page.items);
+    cursor = page.nextCursor;
+  } while (cursor);
+  return items;
+}
+
+// today's date in WIB (YYYY-MM-DD), the day log_date is counted on
+export function todayWIB(): string {
+  return new Date().toLocaleDateString("sv-SE", { timeZone: "Asia/Jakarta" });
+}
@@ -12,7 +12,8 @@ import { StatCard } from "@/components/dashboard/StatCard";
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card";
 import { useEffect, useState } from "react";
 import { useQuery } from "@tanstack/react-query";
-import api from "../lib/api";
+import api from "@/lib/api";
+import { fetchAllPages, fetchPage, todayWIB } from "@/lib/pagination";
 import useAuthStore from "@/stores/useAuthStore";
 export interface Logbook {
   id: number;
@@ -24,6 +25,16 @@ export interface Logbook {
   created_at: string;
 }
 
+interface DailySummary {
+  branch_id: number;
+  branch_name: string;
+  tipe: "LAPTOP" | "HP";
+  log_date: string;
+  taken: number;
+  returned: number;
+  outstanding: number;
+}
+
 export default function Dashboard() {
   const [totaUser, setTotalUser] = useState<number>(0);
   const [logs, setLogs] = useState<Logbook[]>([]);
@@ -49,11 +60,10 @@ export default function Dashboard() {
   useEffect(() => {
     const fetchCount = async () => {
       try {
-        const res = await api.get(
-          `${API_BASE}/students/all?branch_id=${branchId}`
-        );
-        const countUser = res.data["users"];
-        setTotalUser(countUser.length);
+        const students = await fetchAllPages(`${API_BASE}/students/all`, "users", {
+          branch_id: branchId,
+        });
+        setTotalUser(students.length);
       } catch (err) {
         console.log("Failed To fetch data", err);
       }
@@ -63,50 +73,41 @@ export default function Dashboard() {
   }, []);
 
   useEffect(() => {
-    const fetchLogs = async () => {
-      const [laptopRes, hpRes] = await Promise.all([
-        api.get(`${API_BASE}/students/all/log-laptop?branch_id=${branchId}`),
-        api.get(`${API_BASE}/students/all/log-hp?branch_id=${branchId}`),
-      ]);
-
-      const laptopLogs = laptopRes.data["log-laptop"];
-      const hpLogs = hpRes.data["log-hp"];
-
-      const allLogs = [...laptopLogs, ...hpLogs].map((log) => ({
-        ...log,
-        created_at: convertToWIB(log.created_at),
-      }));
-
-      setLogs(allLogs);
-
-      const activeLaptops = allLogs.filter(
-        (item) =>
-          item.tipe === "LAPTOP" &&
-          item.mengambil === "SUDAH" &&
-          item.mengembalikan === "BELUM"
-      );
-
-      const activeHp = allLogs.filter(
-        (item) =>
-          item.tipe === "HP" &&
-          item.mengambil === "SUDAH" &&
-          item.mengembalikan === "BELUM"
-      );
-
-      const today = new Date().toLocaleDateString("id-ID", {
-        timeZone: "Asia/Jakarta",
+    // stat cards come from the daily summary table, counted on the server
+    const fetchSummary = async () => {
+      const today = todayWIB();
+      const res = await api.get(`${API_BASE}/students/all/log-summary`, {
+        params: { date_from: today, date_to: today, ...(branchId ? { branch_id: branchId } : {}) },
       });
+      const rows: DailySummary[] = res.data.summary ?? [];
+      const outstanding = (tipe: DailySummary["tipe"]) =>
+        rows.filter((r) => r.tipe === tipe).reduce((sum, r) => sum + r.outstanding, 0);
 
-      const todayLogs = allLogs.filter((log) =>
-        log.created_at.startsWith(today)
-      );
+      setBorrowedLaptopCount(outstanding("LAPTOP"));
+      setBorrowedHPCount(outstanding("HP"));
+      setLogsCount(rows.reduce((sum, r) => sum + r.taken + r.returned, 0));
+    };
+
+    // recent activities only need the newest few rows of each device type
+    const fetchRecent = async () => {
+      const params = { branch_id: branchId };
+      const [laptopPage, hpPage] = await Promise.all([
+        fetchPage<Logbook>(`${API_BASE}/students/all/log-laptop`, "log-laptop", params, 5),
+        fetchPage<Logbook>(`${API_BASE}/students/all/log-hp`, "log-hp", params, 5),
+      ]);
 
-      setLogsCount(todayLogs.length);
-      setBorrowedLaptopCount(activeLaptops.length);
-      setBorrowedHPCount(activeHp.length);
+      const recent = [...laptopPage.items, ...hpPage.items]
+        .sort((a, b) => (b.created_at ?? "").localeCompare(a.created_at ?? ""))
+        .slice(0, 5)
+        .map((log) => ({
+          ...log,
+          created_at: log.created_at ? convertToWIB(log.created_at) : "-",
+        }));
+      setLogs(recent);
     };
 
-    fetchLogs();
+    fetchSummary().catch((err) => console.log("Failed to fetch log summary", err));
+    fetchRecent().catch((err) => console.log("Failed to fetch recent logs", err));
   }, []);
 
   return (
@@ -17,7 +17,8 @@ import {
   TableHeader,
   TableRow,
 } from "@/components/ui/table";
-import api from "@/lib/api";
+import { Button } from "@/components/ui/button";
+import { fetchPage, type Page } from "@/lib/pagination";
 import useAuthStore from "@/stores/useAuthStore";
 
 interface Logbook {
@@ -33,58 +34,70 @@ interface Logbook {
   time?: string;
 }
 
+const PAGE_SIZE = 100;
+
+type Cursors = { laptop: string | null; hp: string | null };
+
+const noPage: Page<Logbook> = { items: [], nextCursor: null };
+
+function withDateTime(log: Logbook): Logbook {
+  const createdAt = new Date((log.created_at ?? "").replace(" ", "T") + "Z");
+  return {
+    ...log,
+    date: createdAt.toLocaleDateString("id-ID"),
+    time: createdAt.toLocaleTimeString("id-ID", {
+      hour: "2-digit",
+      minute: "2-digit",
+    }),
+  };
+}
+
 export default function Logbook() {
   const [logs, setLogs] = useState<Logbook[]>([]);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [cursors, setCursors] = useState<Cursors>({ laptop: null, hp: null });
   const [selectedDevice, setSelectedDevice] = useState("all");
   const [selectedAction, setSelectedAction] = useState("all");
   const [search, setSearch] = useState("");
   const { branchId } = useAuthStore.getState();
 
-  // 🔹 Fetch all logs (laptop + hp + users)
+  // 🔹 Fetch one page of laptop + hp logs; "Load more" continues from the cursors
+  const loadPage = async (from: Cursors | null) => {
+    const params = { branch_id: branchId };
+    const [laptopPage, hpPage] = await Promise.all([
+      !from || from.laptop
+        ? fetchPage<Logbook>(`${API_BASE}/students/all/log-laptop`, "log-laptop", params, PAGE_SIZE, from?.laptop ?? null)
+        : noPage,
+      !from || from.hp
+        ? fetchPage<Logbook>(`${API_BASE}/students/all/log-hp`, "log-hp", params, PAGE_SIZE, from?.hp ?? null)
+        : noPage,
+    ]);
+
+    const rows = [...laptopPage.items, ...hpPage.items].map(withDateTime);
+    setLogs((prev) =>
+      [...prev, ...rows].sort((a, b) => (b.created_at ?? "").localeCompare(a.created_at ?? ""))
+    );
+    setCursors({ laptop: laptopPage.nextCursor, hp: hpPage.nextCursor });
+  };
+
   useEffect(() => {
-    const fetchLogs = async () => {
-      try {
-        const [laptopRes, hpRes, usersRes] = await Promise.all([
-          api.get(`${API_BASE}/students/all/log-laptop?branch_id=${branchId}`),
-          api.get(`${API_BASE}/students/all/log-hp?branch_id=${branchId}`),
-          api.get(`${API_BASE}/students/all?branch_id=${branchId}`),
-        ]);
-
-        const usersData = usersRes.data.users || usersRes.data;
-        const laptopLogs = laptopRes.data["log-laptop"];
-        const hpLogs = hpRes.data["log-hp"];
-
-        const merged = [...laptopLogs, ...hpLogs].map((log: Logbook) => {
-          const user = usersData.find((u: any) => u.id === log.user_id);
-          const kelas = user ? user.kelas || user.tipe_class || "-" : "-";
-
-          const createdAt = new Date(log.created_at.replace(" ", "T") + "Z");
-          const dateStr = createdAt.toLocaleDateString("id-ID");
-          const timeStr = createdAt.toLocaleTimeString("id-ID", {
-            hour: "2-digit",
-            minute: "2-digit",
-          });
-
-          return {
-            ...log,
-            kelas,
-            date: dateStr,
-            time: timeStr,
-          };
-        });
-
-        setLogs(merged);
-      } catch (err) {
-        console.error("Failed to fetch logs:", err);
-      } finally {
-        setLoading(false);
-      }
-    };
-
-    fetchLogs();
+    loadPage(null)
+      .catch((err) => console.error("Failed to fetch logs:", err))
+      .finally(() => setLoading(false));
   }, []);
 
+  const loadMore = async () => {
+    setLoadingMore(true);
+    try {
+      await loadPage(cursors);
+    } catch (err) {
+      console.error("Failed to fetch logs:", err);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   // 🔹 Filter logs
   const filteredLogs = logs.filter((log) => {
     const matchesDevice =
@@ -198,6 +211,14 @@ export default function Logbook() {
             </TableBody>
           </Table>
         </div>
+
+        {(cursors.laptop || cursors.hp) && (
+          <div className="flex justify-center">
+            <Button variant="outline" onClick={loadMore} disabled={loadingMore}>
+              {loadingMore ? "Loading..." : "Load more"}
+            </Button>
+          </div>
+        )}
       </div>
     </div>
   );
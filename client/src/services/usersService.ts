@@ -1,11 +1,11 @@
 import api from "@/lib/api";
 import { API_BASE } from "@/lib/config";
+import { fetchAllPages } from "@/lib/pagination";
 import { UserProfile, UserRole } from "@/types/users";
 
-// GET /users/
+// GET /users/ (every page)
 export async function fetchUsers(): Promise<UserProfile[]> {
-  const res = await api.get(`${API_BASE}/users/`);
-  return res.data;
+  return fetchAllPages<UserProfile>(`${API_BASE}/users/`, "users");
 }
 
 // GET /users/:id
@@ -0,0 +1,39 @@
+import os
+import uuid
+
+import pytest
+from sqlalchemy import create_engine, text
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+
+@pytest.fixture(scope="module")
+def pg_engine():
+    """Engine on a throwaway schema of TEST_DATABASE_URL, with the app's tables and migrations.
+
+    ``SessionLocal`` is rebound to it for the duration of the module.
+    """
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+
+    from app.database import SessionLocal
+    from app.migrations import run_migrations
+    from app.models import Base
+
+    schema = f"logcam_test_{uuid.uuid4().hex[:8]}"
+    admin = create_engine(TEST_DATABASE_URL)
+    with admin.begin() as conn:
+        conn.execute(text(f"CREATE SCHEMA {schema}"))
+    engine = create_engine(TEST_DATABASE_URL, connect_args={"options": f"-csearch_path={schema}"})
+    previous = SessionLocal.kw.get("bind")
+    try:
+        Base.metadata.create_all(engine)
+        run_migrations(engine)
+        SessionLocal.configure(bind=engine)
+        yield engine
+    finally:
+        SessionLocal.configure(bind=previous)
+        engine.dispose()
+        with admin.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA {schema} CASCADE"))
+        admin.dispose()
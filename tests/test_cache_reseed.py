@@ -0,0 +1,82 @@
+import asyncio
+
+from app.utils import cache_utils
+from app.utils.cache_utils import FRESH_KEY, SEED_LOCK_KEY, reseed_students_cache
+
+
+class FakeRedis:
+    """The few commands the reseed lock uses."""
+
+    def __init__(self):
+        self.data = {}
+
+    async def set(self, key, value, nx=False, px=None, ex=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    async def exists(self, key):
+        return int(key in self.data)
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+    async def eval(self, script, numkeys, key, token):
+        if self.data.get(key) == token:
+            del self.data[key]
+
+
+def setup(monkeypatch):
+    redis = FakeRedis()
+    seeds = []
+    committed = [False]  # whether the caller's rows are in the DB yet
+
+    async def seed():
+        seeds.append({"committed": committed[0]})
+        await asyncio.sleep(0.1)
+
+    monkeypatch.setattr(cache_utils, "get_redis_raw", lambda: redis)
+    monkeypatch.setattr(cache_utils, "seed_students_cache", seed)
+    monkeypatch.setattr(cache_utils, "_local_seed", None)
+    return redis, seeds, committed
+
+
+def test_fresh_reseed_waits_out_a_seed_already_in_flight(monkeypatch):
+    _, seeds, committed = setup(monkeypatch)
+
+    async def scenario():
+        running = asyncio.ensure_future(reseed_students_cache())
+        await asyncio.sleep(0.01)  # that seed has read the DB
+        committed[0] = True
+        return await reseed_students_cache(fresh=True), await running
+
+    assert asyncio.run(scenario()) == (True, True)
+    assert [s["committed"] for s in seeds] == [False, True]
+
+
+def test_fresh_reseed_runs_again_after_another_worker(monkeypatch):
+    redis, seeds, _ = setup(monkeypatch)
+    redis.data[SEED_LOCK_KEY] = "other-worker"
+
+    async def scenario():
+        async def other_worker_finishes():
+            await asyncio.sleep(0.2)
+            redis.data.pop(SEED_LOCK_KEY)
+            redis.data[FRESH_KEY] = b"1"
+
+        asyncio.ensure_future(other_worker_finishes())
+        return await reseed_students_cache(fresh=True)
+
+    assert asyncio.run(scenario()) is True
+    assert len(seeds) == 1
+
+
+def test_fresh_reseed_timeout_clears_the_fresh_marker(monkeypatch):
+    redis, seeds, _ = setup(monkeypatch)
+    redis.data[SEED_LOCK_KEY] = "stuck-worker"
+    redis.data[FRESH_KEY] = b"1"
+
+    assert asyncio.run(reseed_students_cache(wait_timeout=0.2, fresh=True)) is False
+    assert seeds == []
+    assert FRESH_KEY not in redis.data
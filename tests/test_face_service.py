@@ -0,0 +1,24 @@
+import numpy as np
+
+from app.services import face_matcher
+from app.services.face_service import compare_faces
+
+
+def test_compare_faces_never_trains_an_index(monkeypatch):
+    # galleries at or above ANN_MIN_GALLERY get an IVF index; a one-off compare must not pay for training
+    monkeypatch.setattr(face_matcher, "ANN_MIN_GALLERY", 10)
+
+    def no_index(*args, **kwargs):
+        raise AssertionError("compare_faces trained an IVF index")
+
+    monkeypatch.setattr(face_matcher, "IVFIndex", no_index)
+
+    rng = np.random.default_rng(0)
+    known = rng.normal(0, 0.1, (50, 128)).astype(np.float32)
+    probe = known[7] + 0.01
+
+    results, distances = compare_faces(known, probe)
+    assert len(results) == len(distances) == 50
+    assert int(np.argmin(distances)) == 7
+    assert results[7]
+    np.testing.assert_allclose(distances, np.linalg.norm(known - probe, axis=1), rtol=1e-4, atol=1e-4)
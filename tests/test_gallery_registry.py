@@ -0,0 +1,157 @@
+import asyncio
+import os
+import threading
+import time
+
+import numpy as np
+
+from app.services import gallery as gallery_module
+from app.services.gallery import GalleryRegistry
+from app.services.shared_gallery import SharedMatrixStore
+
+
+def row(value: float) -> np.ndarray:
+    return np.full(128, value, dtype=np.float32)
+
+
+def student(sid: int) -> dict:
+    return {"id": sid, "name": f"s{sid}", "branch_id": 1}
+
+
+def upsert(sid: int, version: int) -> dict:
+    return {"op": "upsert", "branch_id": 1, "version": version, "student": student(sid), "embedding": row(sid)}
+
+
+class FakeCache:
+    """Stands in for load_branch_gallery: branch 1 at ``version`` with ``ids``."""
+
+    def __init__(self, ids, version):
+        self.ids, self.version = list(ids), version
+        self.reads = 0
+
+    async def __call__(self, branch_id):
+        self.reads += 1
+        return [student(i) for i in self.ids], np.stack([row(i) for i in self.ids]), {1: self.version}
+
+
+def registry(monkeypatch, cache, build_delay=0.0) -> GalleryRegistry:
+    monkeypatch.setattr(gallery_module, "load_branch_gallery", cache)
+    reg = GalleryRegistry(SharedMatrixStore(directory=None))
+    if build_delay:
+        build = reg._build
+
+        def slow_build(*args, **kwargs):
+            time.sleep(build_delay)
+            return build(*args, **kwargs)
+
+        monkeypatch.setattr(reg, "_build", slow_build)
+    return reg
+
+
+def test_event_during_load_is_applied_after_it(monkeypatch):
+    cache = FakeCache([1, 2], version=3)
+    reg = registry(monkeypatch, cache, build_delay=0.2)
+
+    async def scenario():
+        loading = asyncio.ensure_future(reg.get(1))
+        await asyncio.sleep(0.05)  # the load has read version 3 and is building
+        reg.apply(upsert(7, 4))
+        await loading
+        await reg.drain()
+        return await reg.get(1)
+
+    g = asyncio.run(scenario())
+    assert [s["id"] for s in g.students] == [1, 2, 7]
+    assert g.versions == {1: 4}
+    assert cache.reads == 1
+
+
+def test_reset_during_load_reads_again(monkeypatch):
+    cache = FakeCache([1], version=1)
+    reg = registry(monkeypatch, cache, build_delay=0.2)
+
+    async def scenario():
+        loading = asyncio.ensure_future(reg.get(1))
+        await asyncio.sleep(0.05)
+        cache.ids, cache.version = [1, 5], 2  # reseeded under the load
+        reg.reset()
+        return await loading
+
+    g = asyncio.run(scenario())
+    assert [s["id"] for s in g.students] == [1, 5]
+    assert cache.reads == 2
+
+
+def test_deltas_are_built_off_the_loop_and_in_order(monkeypatch):
+    cache = FakeCache([1], version=1)
+    reg = registry(monkeypatch, cache)
+    threads = []
+    delta = reg._delta
+
+    def traced_delta(*args):
+        threads.append(threading.current_thread())
+        time.sleep(0.05)
+        return delta(*args)
+
+    monkeypatch.setattr(reg, "_delta", traced_delta)
+
+    async def scenario():
+        await reg.get(1)
+        for version, sid in enumerate([2, 3, 4], start=2):
+            reg.apply(upsert(sid, version))
+        await reg.drain()
+        return await reg.get(1)
+
+    g = asyncio.run(scenario())
+    assert [s["id"] for s in g.students] == [1, 2, 3, 4]
+    assert g.versions == {1: 4}
+    assert reg.deltas == 3
+    assert threads and threading.main_thread() not in threads
+
+
+def test_ivf_cells_are_shared_not_copied(monkeypatch, tmp_path):
+    from app.services import face_matcher
+
+    monkeypatch.setattr(face_matcher, "ANN_MIN_GALLERY", 50)
+    cache = FakeCache(range(1, 301), version=1)
+    monkeypatch.setattr(gallery_module, "load_branch_gallery", cache)
+    reg = GalleryRegistry(SharedMatrixStore(directory=str(tmp_path)))
+
+    async def scenario():
+        first = await reg.get(1)
+        reg.apply(upsert(900, 2))
+        await reg.drain()
+        return first, await reg.get(1)
+
+    first, second = asyncio.run(scenario())
+    index = second.matcher.index
+    assert isinstance(index.vectors, np.memmap)
+    assert second.ivf_path and second.ivf_path.endswith(".f32") and "-ivf-" in second.ivf_path
+    np.testing.assert_array_equal(index.vectors, second.matrix[index.perm])
+    # the replaced snapshot's files are gone, the live ones are not
+    assert {p.name for p in tmp_path.iterdir()} == {os.path.basename(p) for p in second.paths}
+    assert not first.paths & second.paths
+    rows, _ = index.search(np.stack([row(900)]), 1)
+    assert second.students[rows[0, 0]]["id"] == 900
+
+
+def test_reset_keeps_files_the_reload_maps_again(monkeypatch, tmp_path):
+    cache = FakeCache([1, 2], version=1)
+    monkeypatch.setattr(gallery_module, "load_branch_gallery", cache)
+    reg = GalleryRegistry(SharedMatrixStore(directory=str(tmp_path)))
+
+    async def scenario():
+        first = await reg.get(1)
+        inode = os.stat(first.path).st_ino
+        reg.reset()  # e.g. the event listener resubscribed
+        same = await reg.get(1)
+        assert same.path == first.path and os.stat(same.path).st_ino == inode
+
+        reg.reset()
+        cache.ids = [1, 2, 3]
+        changed = await reg.get(1)
+        return first, changed
+
+    first, changed = asyncio.run(scenario())
+    assert not os.path.exists(first.path)
+    assert {p.name for p in tmp_path.iterdir()} == {os.path.basename(changed.path)}
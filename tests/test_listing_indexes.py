@@ -0,0 +1,126 @@
+"""EXPLAIN checks that the listing queries use the indexes from migration 0003."""
+from datetime import date
+
+import pytest
+from sqlalchemy import event, text
+
+from app.controllers.student_controller import StudentController
+from app.controllers.user_controller import get_users
+from app.database import SessionLocal
+from app.services.logbook_service import list_logs
+from app.utils.pagination import MAX_UNPAGED_ROWS, PageParams
+
+pytestmark = pytest.mark.postgres
+
+
+@pytest.fixture(scope="module")
+def listing_data(pg_engine):
+    with pg_engine.begin() as conn:
+        conn.execute(text("INSERT INTO branches (name) SELECT 'branch ' || g FROM generate_series(1, 20) g"))
+        conn.execute(text(
+            "INSERT INTO students (name, branch_id, created_at) "
+            "SELECT 'student ' || g, 1 + g % 20, now() - g * interval '1 minute' FROM generate_series(1, 20000) g"
+        ))
+        conn.execute(text(
+            "INSERT INTO log_books (student_id, tipe, log_date, created_at, mengambil, mengembalikan) "
+            "SELECT 1 + g % 20000, CASE WHEN g % 2 = 0 THEN 'HP'::tipe_enum ELSE 'LAPTOP'::tipe_enum END, "
+            "date '2026-01-01' + g / 2000, now() - g * interval '1 second', 'SUDAH', 'BELUM' "
+            "FROM generate_series(1, 100000) g"
+        ))
+        conn.execute(text(
+            "INSERT INTO users (id, name, email, password_hash, branch_id, created_at, deleted_at) "
+            "SELECT gen_random_uuid(), 'user ' || g, 'user' || g || '@example.com', 'x', 1 + g % 20, "
+            "now() - g * interval '1 minute', CASE WHEN g % 10 = 0 THEN now() END FROM generate_series(1, 20000) g"
+        ))
+        conn.execute(text("INSERT INTO roles (id, name) VALUES (gen_random_uuid(), 'TEACHER')"))
+        conn.execute(text("INSERT INTO user_roles (id, user_id, role_id) SELECT gen_random_uuid(), u.id, r.id FROM users u CROSS JOIN roles r"))
+        conn.execute(text("ANALYZE"))
+    return pg_engine
+
+
+def _index_names(node) -> set:
+    names = {node["Index Name"]} if "Index Name" in node else set()
+    for child in node.get("Plans", ()):
+        names |= _index_names(child)
+    return names
+
+
+def indexes_used(engine, fn) -> set:
+    """Run ``fn`` and return the indexes in the EXPLAIN plans of every SELECT it issued."""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    assert statements, "no SELECT was issued"
+
+    names = set()
+    with engine.connect() as conn:
+        for statement, parameters in statements:
+            plan = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters).scalar()
+            # subplans (e.g. the correlated role lookup) hang off the same tree
+            names |= _index_names(plan[0]["Plan"])
+    return names
+
+
+def page(limit=50, cursor=None, date_from=None, date_to=None):
+    return PageParams(limit=limit, cursor=cursor, date_from=date_from, date_to=date_to)
+
+
+def _list_logs(p, **kwargs):
+    db = SessionLocal()
+    try:
+        return list_logs(db, p, **kwargs)
+    finally:
+        db.close()
+
+
+def test_log_listing_uses_tipe_created_index(listing_data):
+    assert "ix_log_books_tipe_created" in indexes_used(listing_data, lambda: _list_logs(page(), tipe="HP"))
+
+
+def test_log_listing_next_page_uses_tipe_created_index(listing_data):
+    _, cursor = _list_logs(page(), tipe="HP")
+    used = indexes_used(listing_data, lambda: _list_logs(page(cursor=cursor), tipe="HP"))
+    assert "ix_log_books_tipe_created" in used
+
+
+def test_log_listing_date_range_uses_a_tipe_index(listing_data):
+    p = page(date_from=date(2026, 1, 10), date_to=date(2026, 1, 11))
+    used = indexes_used(listing_data, lambda: _list_logs(p, tipe="LAPTOP"))
+    assert used & {"ix_log_books_tipe_day", "ix_log_books_tipe_created"}
+
+
+def test_student_listing_uses_created_index(listing_data):
+    used = indexes_used(listing_data, lambda: StudentController.get_all_students(page()))
+    assert "ix_students_created" in used
+
+
+def test_branch_student_listing_uses_branch_index(listing_data):
+    used = indexes_used(listing_data, lambda: StudentController.get_all_students(page(), branch_id=3))
+    assert "ix_students_branch_created" in used
+
+
+def test_user_listing_uses_partial_indexes(listing_data):
+    used = indexes_used(listing_data, lambda: get_users(page()))
+    assert "ix_users_active_created" in used
+    assert "ix_user_roles_user_id" in used
+
+
+def test_branch_user_listing_uses_partial_branch_index(listing_data):
+    used = indexes_used(listing_data, lambda: get_users(page(), branch_id=3))
+    assert "ix_users_active_branch" in used
+
+
+def test_unpaged_log_listing_is_capped(listing_data):
+    rows, cursor = _list_logs(page(limit=None), tipe="HP")
+    assert cursor is None
+    assert len(rows) == MAX_UNPAGED_ROWS
+    first_page, _ = _list_logs(page(), tipe="HP")
+    assert [r["id"] for r in rows[:50]] == [r["id"] for r in first_page]
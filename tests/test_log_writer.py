@@ -0,0 +1,66 @@
+import asyncio
+from datetime import date
+
+import pytest
+from sqlalchemy import text
+
+from app.services import log_writer
+from app.services.log_writer import LogBookWriter
+
+
+def test_failing_entries_are_dropped_after_max_attempts(monkeypatch):
+    async def down(fn, *args):
+        raise ConnectionError("database is down")
+
+    monkeypatch.setattr(log_writer, "run_in_db", down)
+    writer = LogBookWriter(max_attempts=3)
+
+    async def scenario():
+        assert writer.record(1, "LAPTOP", "mengambil")
+        for _ in range(3):
+            with pytest.raises(ConnectionError):
+                await writer.flush()
+
+    asyncio.run(scenario())
+    assert writer.stats()["pending"] == 0
+    assert writer.dropped == 1
+    # given up, so the next recognition queues it again
+    assert writer.record(1, "LAPTOP", "mengambil")
+
+
+@pytest.mark.postgres
+def test_deleted_student_does_not_block_the_batch(pg_engine):
+    with pg_engine.begin() as conn:
+        conn.execute(text("INSERT INTO branches (id, name) VALUES (501, 'writer branch')"))
+        conn.execute(text("INSERT INTO students (id, name, branch_id) VALUES (5001, 'kept', 501), (5002, 'deleted', 501)"))
+
+    writer = LogBookWriter()
+
+    async def scenario():
+        writer.record(5001, "LAPTOP", "mengambil")
+        writer.record(5002, "LAPTOP", "mengambil")
+        with pg_engine.begin() as conn:
+            conn.execute(text("DELETE FROM students WHERE id = 5002"))
+        return await writer.flush()
+
+    assert asyncio.run(scenario()) == 1
+    assert writer.stats()["pending"] == 0
+    assert writer.dropped == 1
+    with pg_engine.connect() as conn:
+        rows = conn.execute(text("SELECT student_id, mengambil FROM log_books WHERE log_date = :d"), {"d": date.today()}).all()
+    assert [tuple(r) for r in rows] == [(5001, "SUDAH")]
+
+
+@pytest.mark.postgres
+def test_rejected_entry_does_not_fail_the_rest(pg_engine):
+    with pg_engine.begin() as conn:
+        conn.execute(text("INSERT INTO branches (id, name) VALUES (502, 'savepoint branch')"))
+        conn.execute(text("INSERT INTO students (id, name, branch_id) VALUES (5003, 'ok', 502)"))
+
+    today = date.today()
+    # not a tipe_enum value, so the batched upsert fails and entries are retried one by one
+    batch = {(5003, "HP", today): {"mengambil"}, (5003, "TABLET", today): {"mengambil"}}
+    assert log_writer._write_batch(batch) == {(5003, "TABLET", today)}
+    with pg_engine.connect() as conn:
+        rows = conn.execute(text("SELECT tipe FROM log_books WHERE student_id = 5003")).scalars().all()
+    assert rows == ["HP"]
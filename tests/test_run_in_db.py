@@ -0,0 +1,74 @@
+import asyncio
+import contextvars
+import time
+from types import SimpleNamespace
+
+from jose import jwt
+
+from app.database import run_in_db
+from app.utils import auth_cache
+from app.utils.auth import ALGORITHM, SECRET_KEY, authenticate_token
+
+request_id = contextvars.ContextVar("request_id", default=None)
+
+
+async def ticking(awaitable):
+    """Await ``awaitable`` while counting 10 ms loop ticks; returns (result, ticks)."""
+    ticks = 0
+    done = False
+
+    async def ticker():
+        nonlocal ticks
+        while not done:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(0)
+    start = ticks
+    try:
+        result = await awaitable
+    finally:
+        done = True
+        await task
+    return result, ticks - start
+
+
+def test_blocking_call_keeps_the_loop_responsive():
+    result, advanced = asyncio.run(ticking(run_in_db(lambda: time.sleep(0.3) or "done")))
+    assert result == "done"
+    # ~30 ticks if the loop stayed free; a blocking call on the loop would allow at most one
+    assert advanced >= 10
+
+
+class SlowSession:
+    """SessionLocal stand-in whose queries block for 0.3 s, like a slow database."""
+
+    def execute(self, stmt):
+        time.sleep(0.3)
+        row = SimpleNamespace(id="u1", name="Slow", branch_id=3)
+        return SimpleNamespace(first=lambda: row)
+
+    def close(self):
+        pass
+
+
+def test_auth_handler_with_a_slow_query_keeps_the_loop_responsive(monkeypatch):
+    monkeypatch.setattr(auth_cache, "SessionLocal", SlowSession)
+    auth_cache.principal_cache.clear()
+    token = jwt.encode({"sub": "u1", "role": "ADMIN"}, SECRET_KEY, algorithm=ALGORITHM)
+
+    try:
+        user, advanced = asyncio.run(ticking(authenticate_token(token)))
+    finally:
+        auth_cache.principal_cache.clear()
+    assert user == {"id": "u1", "name": "Slow", "branch_id": 3, "role": "ADMIN"}
+    assert advanced >= 10
+
+
+def test_context_is_copied_into_the_db_thread():
+    async def scenario():
+        request_id.set("abc")
+        return await run_in_db(request_id.get)
+
+    assert asyncio.run(scenario()) == "abc"
@@ -0,0 +1,54 @@
+import os
+import stat
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from app.services.shared_gallery import SharedMatrixStore
+
+
+def matrix(value: float, rows: int = 4) -> np.ndarray:
+    return np.full((rows, 128), value, dtype=np.float32)
+
+
+def mode(path) -> int:
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def test_directory_and_files_are_private(tmp_path):
+    directory = tmp_path / "gallery"
+    directory.mkdir(mode=0o755)
+    store = SharedMatrixStore(str(directory))
+    _, path = store.share(1, matrix(0.1))
+    assert mode(directory) == 0o700
+    assert mode(path) == 0o600
+
+
+def test_sweep_keeps_files_other_processes_map(tmp_path):
+    store = SharedMatrixStore(str(tmp_path))
+    _, kept = store.share(1, matrix(0.1))
+    _, stale = store.share(2, matrix(0.2))
+    fresh_tmp = tmp_path / "b3-abc.f32.123.tmp"
+    fresh_tmp.write_bytes(b"")
+    old_tmp = tmp_path / "b3-def.f32.456.tmp"
+    old_tmp.write_bytes(b"")
+    os.utime(old_tmp, (time.time() - 3600, time.time() - 3600))
+
+    holder = subprocess.Popen(
+        [sys.executable, "-c",
+         "import mmap, sys, time; f = open(sys.argv[1], 'rb'); m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ); "
+         "print('ready', flush=True); time.sleep(30)", kept],
+        stdout=subprocess.PIPE, text=True,
+    )
+    try:
+        assert holder.stdout.readline().strip() == "ready"
+        # this process maps both files too; only other processes count
+        assert store.sweep() == 2
+    finally:
+        holder.kill()
+        holder.wait()
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted([os.path.basename(kept), fresh_tmp.name])
+    assert not os.path.exists(stale)